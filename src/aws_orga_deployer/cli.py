@@ -1,32 +1,79 @@
 """Parse command-line interface arguments."""
 
-import argparse
-import logging
-import re
+# `argparse`, `logging` and `re` are imported locally by the functions that
+# need them, so that importing this module stays cheap for commands that exit
+# early (e.g. `--help`)
+# pylint: disable=import-outside-toplevel
+from __future__ import annotations
+
+import functools
 import sys
 from os import path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from aws_orga_deployer import config
 
+if TYPE_CHECKING:
+    import argparse
+    import logging
+    import re
+
+# Help strings that interpolate defaults, built once at import time rather
+# than on every parser construction
+_HELP_PACKAGE_FILE = (
+    "Location of the package definition YAML file."
+    f" Default is {config.DEFAULT_PACKAGE_FILE}"
+)
+_HELP_OUTPUT_FILE = (
+    "Location of the JSON file to which the command output details are written."
+    f" Default is {config.DEFAULT_OUTFILE_FILE}"
+)
+_HELP_TEMP_DIR = (
+    "Location of the folder that stores cache and detailed log files. Default"
+    f" is {config.DEFAULT_TEMP_DIR}"
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_pattern(pattern: str) -> re.Pattern:
+    """Compile a regex pattern once and cache it, as the type-check functions
+    are called once per argument value.
+    """
+    import re
+
+    return re.compile(pattern)
+
 
+@functools.lru_cache(maxsize=4096)
 def _account_id_type(value: str) -> str:
-    """Check that the value is an account ID."""
-    pattern = re.compile(r"^[0-9]{12}$")
-    if not pattern.match(value):
-        raise argparse.ArgumentTypeError("Invalid format. Must be a 12-digit string")
-    return value
+    """Check that the value is an account ID. The result is cached so that
+    repeated values are only validated once. Invalid values are not cached, as
+    lru_cache does not memoize calls that raise.
+    """
+    import argparse
+
+    # str.isdigit is faster than a regex for this fixed-length format
+    if len(value) == 12 and value.isascii() and value.isdigit():
+        return value
+    raise argparse.ArgumentTypeError("Invalid format. Must be a 12-digit string")
 
 
+@functools.lru_cache(maxsize=4096)
 def _tag_type(value: str) -> str:
-    """Check that the value is in the form TAG_KEY=TAG_VALUE."""
-    pattern = re.compile(r"^.+=.+$")
-    if not pattern.match(value):
+    """Check that the value is in the form TAG_KEY=TAG_VALUE. The result is
+    cached so that repeated values are only validated once.
+    """
+    import argparse
+
+    if not _compile_pattern(r"^.+=.+$").match(value):
         raise argparse.ArgumentTypeError("Invalid format. Must be TAG_KEY=TAG_VALUE")
     return value
 
 
 def _check_positive_int(value: str) -> int:
     """Check that the argument value is an integer larger than 0."""
+    import argparse
+
     try:
         int_value = int(value)
         if int_value <= 0:
@@ -36,71 +83,13 @@ def _check_positive_int(value: str) -> int:
     return int_value
 
 
-def _parse_cli_args() -> None:
-    """Parse the CLI arguments and store them in the variable `config.CLI`."""
-
-    # Iniialize the parser and define global arguments
-    parser = argparse.ArgumentParser(
-        prog="aws-orga-deployer",
-        description=(
-            "AWS Orga Deployer: Deploy infrastructure-as-code at the scale of an AWS"
-            " organization."
-        ),
-    )
-    parser.add_argument(
-        "-p",
-        "--package-file",
-        default=config.DEFAULT_PACKAGE_FILE,
-        metavar="FILENAME",
-        help=(
-            "Location of the package definition YAML file."
-            f" Default is {config.DEFAULT_PACKAGE_FILE}"
-        ),
-    )
-    parser.add_argument(
-        "-o",
-        "--output-file",
-        default=config.DEFAULT_OUTFILE_FILE,
-        metavar="FILENAME",
-        help=(
-            "Location of the JSON file to which the command output details are written."
-            f" Default is {config.DEFAULT_OUTFILE_FILE}"
-        ),
-    )
-    parser.add_argument(
-        "--temp-dir",
-        default=config.DEFAULT_TEMP_DIR,
-        metavar="DIRNAME",
-        help=(
-            "Location of the folder that stores cache and detailed log files. Default"
-            f" is {config.DEFAULT_TEMP_DIR}"
-        ),
-    )
-    parser.add_argument(
-        "--force-orga-refresh",
-        action="store_true",
-        help=(
-            "Ignore the cache in S3 and force the tool to query AWS Organizations for"
-            " information on accounts and organizational unit"
-        ),
-    )
-    parser.add_argument(
-        "-d",
-        "--debug",
-        action="store_true",
-        help="Increase log verbosity for debugging",
-    )
-    subparsers = parser.add_subparsers(title="command", dest="command")
-    subparsers.required = True
-
-    # Orga command
-    subparsers.add_parser(
-        "orga", help="Export AWS account list and organization structure"
-    )
+@functools.lru_cache(maxsize=None)
+def _parent_detailed_exitcode() -> argparse.ArgumentParser:
+    """Return the parent parser for the `--detailed-exitcode` argument."""
+    import argparse
 
-    # Detailed exit code
-    parent_detailed_exitcode = argparse.ArgumentParser(add_help=False)
-    parent_detailed_exitcode.add_argument(
+    parent = argparse.ArgumentParser(add_help=False)
+    parent.add_argument(
         "--detailed-exitcode",
         action="store_true",
         help=(
@@ -108,10 +97,18 @@ def _parse_cli_args() -> None:
             " succeeded with changes present"
         ),
     )
+    return parent
+
 
-    # Arguments that are common to the list, preview and apply commands
-    parent_list_preview_apply = argparse.ArgumentParser(add_help=False)
-    parent_list_preview_apply.add_argument(
+@functools.lru_cache(maxsize=None)
+def _parent_list_preview_apply() -> argparse.ArgumentParser:
+    """Return the parent parser with the arguments that are common to the list,
+    preview and apply commands.
+    """
+    import argparse
+
+    parent = argparse.ArgumentParser(add_help=False)
+    parent.add_argument(
         "-f",
         "--force-update",
         help=(
@@ -122,7 +119,7 @@ def _parse_cli_args() -> None:
         ),
         action="store_true",
     )
-    scope_group = parent_list_preview_apply.add_argument_group(
+    scope_group = parent.add_argument_group(
         title="filters",
         description=(
             "Restricts the deployment scope defined in the package configuration file,"
@@ -238,22 +235,23 @@ def _parse_cli_args() -> None:
         metavar="KEY=VALUE",
         type=_tag_type,
     )
+    return parent
 
-    # List command
-    subparsers.add_parser(
-        "list",
-        help="List deployed modules and deployments to create, update or destroy",
-        parents=[parent_detailed_exitcode, parent_list_preview_apply],
-    )
 
-    # Arguments that are common to preview and apply commands
-    parent_preview_apply = argparse.ArgumentParser(add_help=False)
-    parent_preview_apply.add_argument(
+@functools.lru_cache(maxsize=None)
+def _parent_preview_apply() -> argparse.ArgumentParser:
+    """Return the parent parser with the arguments that are common to the
+    preview and apply commands.
+    """
+    import argparse
+
+    parent = argparse.ArgumentParser(add_help=False)
+    parent.add_argument(
         "--non-interactive",
         action="store_true",
         help="Do not ask to review and confirm the deployment scope",
     )
-    parent_preview_apply.add_argument(
+    parent.add_argument(
         "--keep-deployment-cache",
         action="store_true",
         help=(
@@ -261,10 +259,18 @@ def _parse_cli_args() -> None:
             " troubleshooting"
         ),
     )
+    return parent
 
-    # Arguments that are common to apply and update-hash
-    parent_apply_update_hash = argparse.ArgumentParser(add_help=False)
-    parent_apply_update_hash.add_argument(
+
+@functools.lru_cache(maxsize=None)
+def _parent_apply_update_hash() -> argparse.ArgumentParser:
+    """Return the parent parser with the arguments that are common to the apply
+    and update-hash commands.
+    """
+    import argparse
+
+    parent = argparse.ArgumentParser(add_help=False)
+    parent.add_argument(
         "--save-state-every-seconds",
         type=_check_positive_int,
         metavar="SECONDS",
@@ -274,8 +280,27 @@ def _parse_cli_args() -> None:
             " an abrupt interruption. Specify a value in seconds larger than zero."
         ),
     )
+    return parent
 
-    # Preview command
+
+def _build_orga_parser(subparsers: argparse._SubParsersAction) -> None:
+    """Add the subparser for the command "orga"."""
+    subparsers.add_parser(
+        "orga", help="Export AWS account list and organization structure"
+    )
+
+
+def _build_list_parser(subparsers: argparse._SubParsersAction) -> None:
+    """Add the subparser for the command "list"."""
+    subparsers.add_parser(
+        "list",
+        help="List deployed modules and deployments to create, update or destroy",
+        parents=[_parent_detailed_exitcode(), _parent_list_preview_apply()],
+    )
+
+
+def _build_preview_parser(subparsers: argparse._SubParsersAction) -> None:
+    """Add the subparser for the command "preview"."""
     subparsers.add_parser(
         "preview",
         help=(
@@ -283,25 +308,29 @@ def _parse_cli_args() -> None:
             " applied"
         ),
         parents=[
-            parent_detailed_exitcode,
-            parent_list_preview_apply,
-            parent_preview_apply,
+            _parent_detailed_exitcode(),
+            _parent_list_preview_apply(),
+            _parent_preview_apply(),
         ],
     )
 
-    # Apply command
+
+def _build_apply_parser(subparsers: argparse._SubParsersAction) -> None:
+    """Add the subparser for the command "apply"."""
     subparsers.add_parser(
         "apply",
         help="Apply pending deployments",
         parents=[
-            parent_detailed_exitcode,
-            parent_list_preview_apply,
-            parent_preview_apply,
-            parent_apply_update_hash,
+            _parent_detailed_exitcode(),
+            _parent_list_preview_apply(),
+            _parent_preview_apply(),
+            _parent_apply_update_hash(),
         ],
     )
 
-    # Update-hash command
+
+def _build_update_hash_parser(subparsers: argparse._SubParsersAction) -> None:
+    """Add the subparser for the command "update-hash"."""
     subparsers.add_parser(
         "update-hash",
         help=(
@@ -309,14 +338,16 @@ def _parse_cli_args() -> None:
             " module source code without needing to update deployments"
         ),
         parents=[
-            parent_detailed_exitcode,
-            parent_list_preview_apply,
-            parent_preview_apply,
-            parent_apply_update_hash,
+            _parent_detailed_exitcode(),
+            _parent_list_preview_apply(),
+            _parent_preview_apply(),
+            _parent_apply_update_hash(),
         ],
     )
 
-    # Arguments that are specific to the command "remove-orphans"
+
+def _build_remove_orphans_parser(subparsers: argparse._SubParsersAction) -> None:
+    """Add the subparser for the command "remove-orphans"."""
     remove_orphans = subparsers.add_parser(
         "remove-orphans",
         help=(
@@ -324,7 +355,7 @@ def _parse_cli_args() -> None:
             " accounts that no longer exist in the AWS organization or regions that are"
             " no longer enabled in an account"
         ),
-        parents=[parent_detailed_exitcode],
+        parents=[_parent_detailed_exitcode()],
     )
     remove_orphans.add_argument(
         "--dry-run",
@@ -335,8 +366,288 @@ def _parse_cli_args() -> None:
         ),
     )
 
-    # Parse the arguments and store them as a dict for use by other modules
-    config.CLI = vars(parser.parse_args())
+
+# Map each command to the function that builds its subparser, so that only the
+# subparser of the requested command needs to be constructed
+_SUBPARSER_BUILDERS = {
+    "orga": _build_orga_parser,
+    "list": _build_list_parser,
+    "preview": _build_preview_parser,
+    "apply": _build_apply_parser,
+    "update-hash": _build_update_hash_parser,
+    "remove-orphans": _build_remove_orphans_parser,
+}
+
+
+# Tables used by the hand-written parser in `_fast_parse`. The CLI structure
+# is static, so the common invocations can be parsed with plain dict lookups
+# instead of building argparse parsers. Any token that these tables do not
+# cover makes `_fast_parse` fall back to argparse, which also owns the help
+# and error messages
+_FAST_GLOBAL_BOOL = {
+    "--force-orga-refresh": "force_orga_refresh",
+    "-d": "debug",
+    "--debug": "debug",
+}
+_FAST_GLOBAL_VALUE = {
+    "-p": "package_file",
+    "--package-file": "package_file",
+    "-o": "output_file",
+    "--output-file": "output_file",
+    "--temp-dir": "temp_dir",
+}
+_FAST_FILTER_MULTI = {
+    "--include-modules": "include_modules",
+    "--include-regions": "include_regions",
+    "--include-account-ids": "include_account_ids",
+    "--include-account-tags": "include_account_tags",
+    "--include-account-names": "include_account_names",
+    "--include-ou-ids": "include_ou_ids",
+    "--include-ou-tags": "include_ou_tags",
+    "--exclude-modules": "exclude_modules",
+    "--exclude-regions": "exclude_regions",
+    "--exclude-account-ids": "exclude_account_ids",
+    "--exclude-account-tags": "exclude_account_tags",
+    "--exclude-account-names": "exclude_account_names",
+    "--exclude-ou-ids": "exclude_ou_ids",
+    "--exclude-ou-tags": "exclude_ou_tags",
+}
+_FAST_LIST_BOOL = {
+    "--detailed-exitcode": "detailed_exitcode",
+    "-f": "force_update",
+    "--force-update": "force_update",
+}
+_FAST_PREVIEW_BOOL = {
+    **_FAST_LIST_BOOL,
+    "--non-interactive": "non_interactive",
+    "--keep-deployment-cache": "keep_deployment_cache",
+}
+_FAST_APPLY_VALUE = {"--save-state-every-seconds": "save_state_every_seconds"}
+_FAST_FILTER_DEFAULTS: Dict[str, Any] = {
+    dest: None for dest in _FAST_FILTER_MULTI.values()
+}
+_FAST_LIST_DEFAULTS: Dict[str, Any] = {
+    "detailed_exitcode": False,
+    "force_update": False,
+    **_FAST_FILTER_DEFAULTS,
+}
+_FAST_PREVIEW_DEFAULTS: Dict[str, Any] = {
+    **_FAST_LIST_DEFAULTS,
+    "non_interactive": False,
+    "keep_deployment_cache": False,
+}
+_FAST_APPLY_DEFAULTS: Dict[str, Any] = {
+    **_FAST_PREVIEW_DEFAULTS,
+    "save_state_every_seconds": 0,
+}
+# Map each command to its bool flags, value flags, multi-value flags and
+# default values
+_FAST_COMMANDS = {
+    "orga": ({}, {}, {}, {}),
+    "list": (_FAST_LIST_BOOL, {}, _FAST_FILTER_MULTI, _FAST_LIST_DEFAULTS),
+    "preview": (_FAST_PREVIEW_BOOL, {}, _FAST_FILTER_MULTI, _FAST_PREVIEW_DEFAULTS),
+    "apply": (
+        _FAST_PREVIEW_BOOL,
+        _FAST_APPLY_VALUE,
+        _FAST_FILTER_MULTI,
+        _FAST_APPLY_DEFAULTS,
+    ),
+    "update-hash": (
+        _FAST_PREVIEW_BOOL,
+        _FAST_APPLY_VALUE,
+        _FAST_FILTER_MULTI,
+        _FAST_APPLY_DEFAULTS,
+    ),
+    "remove-orphans": (
+        {"--detailed-exitcode": "detailed_exitcode", "--dry-run": "dry_run"},
+        {},
+        {},
+        {"detailed_exitcode": False, "dry_run": False},
+    ),
+}
+
+
+def _fast_convert(dest: str, value: str) -> Any:
+    """Validate and convert a single option value for the hand-written parser.
+    Return None if the value is invalid, so that `_fast_parse` falls back to
+    argparse which emits the error message.
+    """
+    if dest in ("include_account_ids", "exclude_account_ids"):
+        is_account_id = len(value) == 12 and value.isascii() and value.isdigit()
+        return value if is_account_id else None
+    if dest in (
+        "include_account_tags",
+        "exclude_account_tags",
+        "include_ou_tags",
+        "exclude_ou_tags",
+    ):
+        tag_key, _, tag_value = value.partition("=")
+        return value if tag_key and tag_value else None
+    if dest == "save_state_every_seconds":
+        return int(value) if value.isdigit() and int(value) > 0 else None
+    return value
+
+
+def _fast_parse(argv: List[str]) -> Optional[Dict[str, Any]]:
+    """Parse the CLI arguments with plain dict lookups and return them as a
+    dict, or return None if the arguments require the full argparse parser
+    (unknown or abbreviated options, missing or invalid values).
+
+    Args:
+        argv: Arguments to parse, without the program name.
+
+    Returns:
+        Parsed arguments, or None to fall back to argparse.
+    """
+    # pylint: disable=too-many-return-statements
+    # Every unsupported or invalid form returns None to hand over to argparse
+    result: Dict[str, Any] = {
+        "package_file": config.DEFAULT_PACKAGE_FILE,
+        "output_file": config.DEFAULT_OUTFILE_FILE,
+        "temp_dir": config.DEFAULT_TEMP_DIR,
+        "force_orga_refresh": False,
+        "debug": False,
+    }
+    command: Optional[str] = None
+    # Global flags are only valid before the command token. Once the command
+    # is found, the tables are replaced by those of the command
+    bool_flags: Dict[str, str] = _FAST_GLOBAL_BOOL
+    value_flags: Dict[str, str] = _FAST_GLOBAL_VALUE
+    multi_flags: Dict[str, str] = {}
+    index = 0
+    length = len(argv)
+    while index < length:
+        token = argv[index]
+        index += 1
+        inline_value: Optional[str] = None
+        if token.startswith("--") and "=" in token:
+            token, _, inline_value = token.partition("=")
+        if token in bool_flags:
+            if inline_value is not None:
+                return None
+            result[bool_flags[token]] = True
+        elif token in value_flags:
+            if inline_value is None:
+                # A token that looks like an option is not a valid value;
+                # argparse errors with "expected one argument" in that case
+                if index >= length or argv[index].startswith("-"):
+                    return None
+                inline_value = argv[index]
+                index += 1
+            dest = value_flags[token]
+            converted = _fast_convert(dest, inline_value)
+            if converted is None:
+                return None
+            result[dest] = converted
+        elif token in multi_flags:
+            dest = multi_flags[token]
+            values: List[str] = []
+            if inline_value is not None:
+                values.append(inline_value)
+            else:
+                while index < length and not argv[index].startswith("-"):
+                    values.append(argv[index])
+                    index += 1
+            if not values:
+                return None
+            converted_values = [_fast_convert(dest, item) for item in values]
+            if any(item is None for item in converted_values):
+                return None
+            result[dest] = converted_values
+        elif command is None and not token.startswith("-"):
+            spec = _FAST_COMMANDS.get(token)
+            if spec is None:
+                return None
+            command = token
+            bool_flags, value_flags, multi_flags, defaults = spec
+            result.update(defaults)
+        else:
+            return None
+    if command is None:
+        return None
+    result["command"] = command
+    return result
+
+
+def _argparse_cli_args() -> Dict[str, Any]:
+    """Parse the CLI arguments with argparse and return them as a dict."""
+    import argparse
+
+    # Iniialize the parser and define global arguments
+    parser = argparse.ArgumentParser(
+        prog="aws-orga-deployer",
+        description=(
+            "AWS Orga Deployer: Deploy infrastructure-as-code at the scale of an AWS"
+            " organization."
+        ),
+    )
+    parser.add_argument(
+        "-p",
+        "--package-file",
+        default=config.DEFAULT_PACKAGE_FILE,
+        metavar="FILENAME",
+        help=_HELP_PACKAGE_FILE,
+    )
+    parser.add_argument(
+        "-o",
+        "--output-file",
+        default=config.DEFAULT_OUTFILE_FILE,
+        metavar="FILENAME",
+        help=_HELP_OUTPUT_FILE,
+    )
+    parser.add_argument(
+        "--temp-dir",
+        default=config.DEFAULT_TEMP_DIR,
+        metavar="DIRNAME",
+        help=_HELP_TEMP_DIR,
+    )
+    parser.add_argument(
+        "--force-orga-refresh",
+        action="store_true",
+        help=(
+            "Ignore the cache in S3 and force the tool to query AWS Organizations for"
+            " information on accounts and organizational unit"
+        ),
+    )
+    parser.add_argument(
+        "-d",
+        "--debug",
+        action="store_true",
+        help="Increase log verbosity for debugging",
+    )
+    subparsers = parser.add_subparsers(title="command", dest="command")
+    subparsers.required = True
+
+    # Find the first token that does not look like an optional argument. If it
+    # corresponds to a known command, only the subparser of that command needs
+    # to be constructed. Otherwise (e.g. `--help` or an unknown command), build
+    # all subparsers to preserve the help and error messages
+    command = None
+    for token in sys.argv[1:]:
+        if not token.startswith("-"):
+            command = token
+            break
+    if command in _SUBPARSER_BUILDERS:
+        _SUBPARSER_BUILDERS[command](subparsers)
+    else:
+        for build_subparser in _SUBPARSER_BUILDERS.values():
+            build_subparser(subparsers)
+
+    return vars(parser.parse_args())
+
+
+def _parse_cli_args() -> None:
+    """Parse the CLI arguments and store them in the variable `config.CLI`.
+
+    The hand-written parser `_fast_parse` handles the common invocations, so
+    that the argparse parsers only need to be constructed when help is
+    requested or when the fast path does not recognize a token.
+    """
+    argv = sys.argv[1:]
+    args = None if "-h" in argv or "--help" in argv else _fast_parse(argv)
+    if args is None:
+        args = _argparse_cli_args()
+    config.CLI = args
     # Use the absolute path of the temporary folder
     config.CLI["temp_dir"] = path.abspath(config.CLI["temp_dir"])
 
@@ -347,6 +658,8 @@ def _create_cli_logger() -> logging.Logger:
     Returns:
         CLI logger
     """
+    import logging
+
     logger = logging.getLogger("aws_orga_deployer")
     logger.setLevel(logging.DEBUG if config.CLI["debug"] is True else logging.INFO)
     stream_handler = logging.StreamHandler(sys.stdout)
@@ -38,6 +38,10 @@ STATE_FILENAME: str = "state.json"
 # filename to include or exclude to calculate module hash
 HASH_CONFIG_FILENAME: str = "hash-config.json"
 
+# Name of the local file in the temporary directory that caches the module
+# hashes so that unchanged modules are not rehashed on every invocation
+HASH_CACHE_FILENAME: str = "hash-cache.json"
+
 # Default number of concurrent workers
 DEFAULT_CONCURRENT_WORKERS: int = 10
 
@@ -1,8 +1,10 @@
 """Modules for each supported engine."""
 
 import os
+import sys
+from collections.abc import Mapping
 from importlib import import_module
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
 # List the supported engines
 engine_names: List[str] = [
@@ -12,8 +14,32 @@ engine_names: List[str] = [
 ]
 
 
-# Load the class Engine of each supported module in a dict
-ENGINES: Dict[str, Any] = {}
-for engine_name in engine_names:
-    module = import_module(f"aws_orga_deployer.engines.{engine_name}")
-    ENGINES[engine_name] = module.Engine
+class _LazyEngines(Mapping):
+    """Read-only mapping of engine names to Engine classes. Each engine module
+    is imported on first access only, so that commands that do not need an
+    engine do not pay its import cost. The names are interned so that the
+    frequent lookups compare by identity.
+    """
+
+    def __init__(self, names: List[str]) -> None:
+        self._names = tuple(sys.intern(name) for name in names)
+        self._loaded: Dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        name = sys.intern(name)
+        if name not in self._loaded:
+            if name not in self._names:
+                raise KeyError(name)
+            module = import_module(f"aws_orga_deployer.engines.{name}")
+            self._loaded[name] = module.Engine
+        return self._loaded[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+# The class Engine of each supported module, loaded on demand
+ENGINES: Mapping = _LazyEngines(engine_names)
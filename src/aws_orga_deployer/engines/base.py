@@ -1,28 +1,157 @@
 """Base class inherited by engine classes."""
 
+import fnmatch
+import functools
 import hashlib
 import json
 import logging
 import os
 import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import jsonschema
 
 from aws_orga_deployer import config
 from aws_orga_deployer.package.store import ModuleAccountRegionKey
 
+# `slots=True` removes the per-instance __dict__ of the step dataclasses,
+# which are instantiated once per deployment step. Only supported by
+# dataclasses from Python 3.10
+_DATACLASS_SLOTS: Dict[str, bool] = (
+    {"slots": True} if sys.version_info >= (3, 10) else {}
+)
+
+try:
+    # orjson is optional and considerably faster than the standard library
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
 LOGGER = logging.getLogger(__name__)
 LOGGER.addHandler(logging.NullHandler())
 
 
-@dataclass
+def json_loads(data: bytes) -> Any:
+    """Parse JSON bytes, with orjson if available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize an object to JSON bytes, with orjson if available.
+
+    Args:
+        obj: Object to serialize.
+        indent: True to indent the output for readability.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+
+# Content of the local module hash cache, loaded from disk on first use. The
+# lock makes the cache safe to consult from concurrent prepare/hash threads
+_hash_cache: Optional[Dict[str, Dict[str, str]]] = None
+_hash_cache_lock = threading.Lock()
+
+
+def _compile_filename_filter(
+    included_patterns: List[str], excluded_patterns: List[str]
+) -> re.Pattern:
+    """Compile the include and exclude glob patterns into a single regex with
+    named alternations, so that each file name is matched in one pass. A file
+    name is retained if it matches the group "inc" and not the group "exc".
+    """
+    # "(?!)" never matches, so an empty include list retains nothing and an
+    # empty exclude list excludes nothing
+    inc_alt = (
+        "|".join(f"(?:{fnmatch.translate(pattern)})" for pattern in included_patterns)
+        or "(?!)"
+    )
+    exc_alt = (
+        "|".join(f"(?:{fnmatch.translate(pattern)})" for pattern in excluded_patterns)
+        or "(?!)"
+    )
+    return re.compile(f"(?P<exc>{exc_alt})|(?P<inc>{inc_alt})", re.IGNORECASE)
+
+
+def _hash_cache_filename() -> Optional[str]:
+    """Return the path of the local module hash cache, or None if no temporary
+    directory is configured.
+    """
+    temp_dir = config.CLI.get("temp_dir")
+    if temp_dir is None:
+        return None
+    return os.path.join(temp_dir, "cache", config.HASH_CACHE_FILENAME)
+
+
+def _get_cached_hash(module_dir: str, fingerprint: str) -> Optional[str]:
+    """Return the cached module hash if the fingerprint of the module files
+    has not changed, or None.
+
+    Args:
+        module_dir: Path to the module directory.
+        fingerprint: Fingerprint of the module files.
+    """
+    # pylint: disable=global-statement
+    global _hash_cache
+    with _hash_cache_lock:
+        if _hash_cache is None:
+            _hash_cache = {}
+            filename = _hash_cache_filename()
+            if filename is not None:
+                try:
+                    with open(filename, "r", encoding="utf-8") as stream:
+                        content = json.load(stream)
+                        assert isinstance(content, dict)
+                        _hash_cache = content
+                except (FileNotFoundError, IOError, ValueError, AssertionError):
+                    LOGGER.debug("No valid module hash cache found at %s", filename)
+        entry = _hash_cache.get(module_dir)
+    if entry is not None and entry.get("Fingerprint") == fingerprint:
+        return entry.get("Hash")
+    return None
+
+
+def _store_cached_hash(module_dir: str, fingerprint: str, module_hash: str) -> None:
+    """Store a module hash in the local cache and write the cache to disk
+    atomically.
+
+    Args:
+        module_dir: Path to the module directory.
+        fingerprint: Fingerprint of the module files.
+        module_hash: Module hash to cache.
+    """
+    filename = _hash_cache_filename()
+    with _hash_cache_lock:
+        if _hash_cache is not None:
+            _hash_cache[module_dir] = {"Fingerprint": fingerprint, "Hash": module_hash}
+        if filename is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            # Write to a temporary file and rename it so that a concurrent run
+            # never reads a partially-written cache
+            temp_filename = filename + ".tmp"
+            with open(temp_filename, "w", encoding="utf-8") as stream:
+                json.dump(_hash_cache, stream)
+            os.replace(temp_filename, filename)
+        except OSError:
+            LOGGER.debug("Failed to write the module hash cache at %s", filename)
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class StepCommand:
     """Details about a subprocess to execute.
 
     Attributes:
         name: Friendly name for the subprocess
-        args: List of subprocess arguments.
+        args: Sequence of subprocess arguments.
         cwd: Current working directory of the subprocess.
         assume_role: True if the IAM role must be assumed and AWS temporary
             credentials must be provided as environment variables to the
@@ -31,17 +160,23 @@ class StepCommand:
             Default to an empty dict (no additional environment variables).
         stdout_file: To save the content of the subprocess standard output
             `stdout` to a file, provide a file path.
+        persistent: True if the command invokes a wrapper script that supports
+            the `--worker` mode, in which case the executor may route it to a
+            reused worker process instead of spawning a new subprocess. The
+            first two items of `args` must be the Python executable and the
+            wrapper script path.
     """
 
     name: str
-    args: List[str]
+    args: Sequence[str]
     cwd: str
     assume_role: bool
     env: Dict[str, str] = field(default_factory=dict)
     stdout_file: Optional[str] = None
+    persistent: bool = False
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class StepOutcome:
     """Contains the results of the step execution.
 
@@ -86,8 +221,16 @@ class BaseEngine:
     module_dir: str
     default_included_patterns: List[str] = ["*"]
     default_excluded_patterns: List[str] = []
+    # Additional module configuration properties supported by the engine, as a
+    # JSON schema fragment with optional "properties" and "required" keys that
+    # extend the schema common to all engines
+    module_config_schema: Dict[str, Any] = {}
     included_patterns: List[str]
     excluded_patterns: List[str]
+    _filter_re: re.Pattern
+    # Per-engine-class cache of the compiled module configuration validator,
+    # read through cls.__dict__ so that subclasses do not inherit the value
+    _module_config_validator_cache: Optional[jsonschema.Draft7Validator] = None
 
     def __init__(self, name: str, path: str) -> None:
         """Create a BaseEngine instance.
@@ -99,11 +242,54 @@ class BaseEngine:
         self.name = name
         self.module_dir = path
         self._get_filename_patterns_to_hash()
-        self.module_hash = self._generate_module_hash()
+
+    @functools.cached_property
+    def module_hash(self) -> str:
+        """Module hash, computed on first access so that commands that never
+        consult it (e.g. "orga") do not pay for hashing the module files.
+        """
+        return self._generate_module_hash()
 
     def _generate_module_hash(self) -> str:
-        """Return the MD5 hash of the module."""
-        return self._md5_update_from_dir(self.module_dir, hashlib.md5()).hexdigest()
+        """Return the MD5 hash of the module. The hash of each file is computed
+        in a separate thread, and the per-file hashes are folded into the
+        module hash in a deterministic order so that the result is
+        reproducible.
+        """
+        files = self._list_files_to_hash()
+        # Reuse the hash cached on disk if no file was added, removed or
+        # modified since it was computed
+        fingerprint = BaseEngine._hash_fingerprint(files)
+        cached = _get_cached_hash(self.module_dir, fingerprint)
+        if cached is not None:
+            LOGGER.debug("[%s] Reusing the module hash cached on disk", self.name)
+            return cached
+        module_hash = hashlib.md5()
+        if files:
+            with ThreadPoolExecutor(
+                max_workers=config.CONCURRENT_ORGA_THREADS
+            ) as executor:
+                digests = executor.map(
+                    BaseEngine._md5_file_digest, [filename for _, filename in files]
+                )
+            for (name, _), digest in zip(files, digests):
+                module_hash.update(name.encode())
+                module_hash.update(digest)
+        result = module_hash.hexdigest()
+        _store_cached_hash(self.module_dir, fingerprint, result)
+        return result
+
+    @staticmethod
+    def _hash_fingerprint(files: List[Tuple[str, str]]) -> str:
+        """Return a fingerprint of the files to hash, based on their path,
+        modification time and size, which is much cheaper to compute than
+        reading the file contents.
+        """
+        sha1 = hashlib.sha1()
+        for _, filename in files:
+            stat = os.stat(filename)
+            sha1.update(f"{filename}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+        return sha1.hexdigest()
 
     def _get_filename_patterns_to_hash(self) -> None:
         """Set the values of `self.included_patterns` and
@@ -116,7 +302,7 @@ class BaseEngine:
             # Load the hash configuration file if it exists in this module
             filename = os.path.join(self.module_dir, config.HASH_CONFIG_FILENAME)
             with open(filename, "rb") as stream:
-                content = json.load(stream)
+                content = json_loads(stream.read())
                 assert isinstance(content, dict)
                 if "Include" in content:
                     self.included_patterns = content["Include"]
@@ -147,52 +333,90 @@ class BaseEngine:
                 ",".join(self.included_patterns),
                 ",".join(self.excluded_patterns),
             )
+        # Compile the patterns once, as they are matched against every file
+        # name in the module directory
+        self._filter_re = _compile_filename_filter(
+            self.included_patterns, self.excluded_patterns
+        )
 
     @staticmethod
-    def _md5_update_from_file(filename: str, dir_hash: Any) -> Any:
-        """Update the MD5 hash with a file."""
-        assert Path(filename).is_file()
-        with open(str(filename), "rb") as stream:
-            for chunk in iter(lambda: stream.read(4096), b""):
-                dir_hash.update(chunk)
-        return dir_hash
-
-    def _md5_update_from_dir(self, directory: str, dir_hash: Any) -> Any:
-        """Update the MD5 hash by browsing files and folders recursively. Only
-        the file names matching the patterns are used to compute the hash.
+    def _md5_file_digest(filename: str) -> bytes:
+        """Return the MD5 digest of a file."""
+        # Read with a 1 MiB buffer to limit the number of Python-level
+        # iterations on large files
+        file_hash = hashlib.md5()
+        with open(filename, "rb") as stream:
+            while chunk := stream.read(1 << 20):
+                file_hash.update(chunk)
+        return file_hash.digest()
+
+    def _list_files_to_hash(self) -> List[Tuple[str, str]]:
+        """Browse the module directory recursively and return the
+        `(relative_name, absolute_path)` pairs of the files to use for
+        computing the module hash, in a deterministic order. Only the file
+        names matching the patterns are used to compute the hash.
+        """
+        result: List[Tuple[str, str]] = []
+        # Hoist the loop invariants out of the per-file loop
+        match_filter = self._filter_re.match
+        hash_config_filename = config.HASH_CONFIG_FILENAME
+        # Walk the tree iteratively with os.scandir, whose DirEntry objects
+        # cache the file type and avoid one stat call per entry
+        stack = [(self.module_dir, "")]
+        while stack:
+            directory, prefix = stack.pop()
+            with os.scandir(directory) as iterator:
+                entries = list(iterator)
+            for entry in entries:
+                # Browse subfolders
+                if entry.is_dir():
+                    stack.append((entry.path, prefix + entry.name + "/"))
+                elif entry.is_file():
+                    # Check that the filename matches one of the included
+                    # patterns, and not any of the excluded filename patterns,
+                    # in a single pass over the combined regex. The hash
+                    # configuration file is also excluded
+                    match = match_filter(entry.name)
+                    if (
+                        match is None
+                        or match.group("inc") is None
+                        or entry.name.endswith(hash_config_filename)
+                    ):
+                        continue
+                    result.append((prefix + entry.name, entry.path))
+        # Sort by relative name so that the fold order is deterministic
+        # whatever the order in which directories were scanned
+        result.sort()
+        return result
+
+    @classmethod
+    def _get_module_config_validator(cls) -> jsonschema.Draft7Validator:
+        """Return the compiled validator for the module configuration of this
+        engine, building it on first use by merging the schema attributes
+        common to all engines with `module_config_schema`.
         """
-        assert Path(directory).is_dir()
-        # For each file or folder in this directory
-        for path in sorted(Path(directory).iterdir()):
-            # Browse subfolders recursively
-            if path.is_dir():
-                dir_hash = self._md5_update_from_dir(str(path), dir_hash)
-            elif path.is_file():
-                # Check that the filename matches one of the included patterns,
-                # and not any of the excluded filename patterns. The hash
-                # configuration file is also excluded
-                is_included = False
-                is_excluded = False
-                for pattern in self.included_patterns:
-                    expr = re.escape(pattern).replace("\\*", ".*").lower()
-                    if re.match(expr, path.name.lower()):
-                        is_included = True
-                        break
-                for pattern in self.excluded_patterns:
-                    expr = re.escape(pattern).replace("\\*", ".*").lower()
-                    if re.match(expr, path.name.lower()):
-                        is_excluded = True
-                        break
-                if (
-                    not is_included
-                    or is_excluded
-                    or path.name.endswith(config.HASH_CONFIG_FILENAME)
-                ):
-                    continue
-                # Update the hash with the file name and content
-                dir_hash.update(path.name.encode())
-                dir_hash = BaseEngine._md5_update_from_file(str(path), dir_hash)
-        return dir_hash
+        validator = cls.__dict__.get("_module_config_validator_cache")
+        if validator is None:
+            schema: Dict[str, Any] = {
+                "type": "object",
+                "properties": {
+                    "AssumeRole": {"type": ["string", "null"]},
+                    "Retry": {
+                        "type": "object",
+                        "properties": {
+                            "MaxAttempts": {"type": "integer", "minimum": 1},
+                            "DelayBeforeRetrying": {"type": "integer", "minimum": 0},
+                        },
+                    },
+                    "EndpointUrls": {"type": "object"},
+                },
+            }
+            schema["properties"].update(cls.module_config_schema.get("properties", {}))
+            if cls.module_config_schema.get("required"):
+                schema["required"] = cls.module_config_schema["required"]
+            validator = jsonschema.Draft7Validator(schema)
+            cls._module_config_validator_cache = validator
+        return validator
 
     def validate_module_config(self, module_config: Dict[str, Any]) -> None:
         """Validate the content of the module configuration.
@@ -203,28 +427,8 @@ class BaseEngine:
         Raises:
             AssertionError
         """
-        # Check that AssumeRole is None or a string
-        assume_role = module_config.get("AssumeRole")
-        assert assume_role is None or isinstance(
-            assume_role, str
-        ), 'AssumeRole must be "null" or a string'
-        # Check Retry parameters
-        if "Retry" in module_config:
-            if "MaxAttempts" in module_config["Retry"]:
-                max_attempts = module_config["Retry"]["MaxAttempts"]
-                assert isinstance(max_attempts, int), "MaxAttempts must be an integer"
-                assert max_attempts > 0, "MaxAttempts must be larger than 0"
-            if "DelayBeforeRetrying" in module_config["Retry"]:
-                delay = module_config["Retry"]["DelayBeforeRetrying"]
-                assert isinstance(delay, int), "DelayBeforeRetrying must be an integer"
-                assert (
-                    delay >= 0
-                ), "DelayBeforeRetrying must be larger than or equal to 0"
-        # Check EndpointUrls
-        if "EndpointUrls" in module_config:
-            assert isinstance(
-                module_config["EndpointUrls"], dict
-            ), "EndpointUrls must be a dict"
+        for error in self._get_module_config_validator().iter_errors(module_config):
+            raise AssertionError(error.message)
 
     def prepare(
         self,
@@ -235,9 +439,12 @@ class BaseEngine:
         module_config: Dict[str, Any],
         deployment_cache_dir: str,
         engine_cache_dir: str,
-    ) -> List[StepCommand]:
-        """Prepare inputs and return a list of commands to execute in
-        subprocesses.
+    ) -> Iterable[StepCommand]:
+        """Prepare inputs and return the commands to execute in
+        subprocesses, either as a list or lazily as a generator consumed
+        sequentially by the executor. Implementations must only write under
+        `deployment_cache_dir` and not mutate engine-level state, so that
+        steps can be prepared concurrently from multiple worker threads.
 
         Args:
             key: Step key to execute.
@@ -313,8 +520,8 @@ class BaseEngine:
         }
         # Write the content to a file `input.json`
         input_file = os.path.join(deployment_cache_dir, "input.json")
-        with open(input_file, "w", encoding="utf-8") as stream:
-            json.dump(input_content, stream)
+        with open(input_file, "wb") as stream:
+            stream.write(json_dumps(input_content))
 
     def read_wrapper_outputs(self, deployment_cache_dir: str) -> StepOutcome:
         """When using a Python wrapper script, read the outputs of the wrapper
@@ -327,13 +534,14 @@ class BaseEngine:
             StepOutcome object.
         """
         output_file = os.path.join(deployment_cache_dir, "output.json")
-        with open(output_file, "r", encoding="utf-8") as stream:
-            content = json.load(stream)
-            made_changes = content["MadeChanges"]
-            result = content["Result"]
-            detailed_results = content["DetailedResults"]
-            outputs = content["Outputs"]
-        return StepOutcome(made_changes, result, detailed_results, outputs)
+        with open(output_file, "rb") as stream:
+            content = json_loads(stream.read())
+        return StepOutcome(
+            content["MadeChanges"],
+            content["Result"],
+            content["DetailedResults"],
+            content["Outputs"],
+        )
 
 
 def get_python_executable(module_config: Dict[str, Any]) -> str:
@@ -346,7 +554,7 @@ def get_python_executable(module_config: Dict[str, Any]) -> str:
         Path to the Python executable.
     """
     # Default value if no custom value is provided in the module configuration
-    python_exec = "python3"
-    if not module_config.get("PythonExecutable") is None:
-        python_exec = module_config["PythonExecutable"]
+    python_exec = module_config.get("PythonExecutable")
+    if python_exec is None:
+        return "python3"
     return python_exec
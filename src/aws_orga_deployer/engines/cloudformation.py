@@ -6,6 +6,12 @@ from typing import Any, Dict, List
 from aws_orga_deployer.engines import base
 from aws_orga_deployer.package.store import ModuleAccountRegionKey
 
+# Path to the CloudFormation wrapper script, resolved once at import time as
+# it never changes between steps
+_WRAPPER_FILE = path.join(
+    path.dirname(path.abspath(__file__)), "wrappers", "cloudformation.py"
+)
+
 
 class Engine(base.BaseEngine):
     """Engine for CloudFormation modules."""
@@ -13,31 +19,18 @@ class Engine(base.BaseEngine):
     engine = "cloudformation"
     default_included_patterns = ["*.json", "*.yaml"]
     default_excluded_patterns = []
-
-    def validate_module_config(self, module_config: Dict[str, Any]) -> None:
-        """Validate the content of the module configuration.
-
-        Args:
-            module_config: Module configuration.
-
-        Raises:
-            AssertionError
-        """
-        super().validate_module_config(module_config)
-        assert "StackName" in module_config, "StackName is missing"
-        assert isinstance(module_config["StackName"], str), "StackName must be a string"
-        assert "TemplateFilename" in module_config, "TemplateFilename is missing"
-        assert isinstance(
-            module_config["TemplateFilename"], str
-        ), "TemplateFilename must be a string"
-        if "AdditionalBoto3Parameters" in module_config:
-            assert isinstance(
-                module_config["AdditionalBoto3Parameters"], dict
-            ), "AdditionalBoto3Parameters must be a dict"
-        if "PythonExecutable" in module_config:
-            assert isinstance(
-                module_config["PythonExecutable"], str
-            ), "PythonExecutable must be a string"
+    module_config_schema = {
+        "properties": {
+            "StackName": {"type": "string"},
+            "TemplateFilename": {"type": "string"},
+            "TemplateStagingBucket": {"type": "string"},
+            "NotificationTopicArn": {"type": "string"},
+            "NotificationQueueUrl": {"type": "string"},
+            "AdditionalBoto3Parameters": {"type": "object"},
+            "PythonExecutable": {"type": "string"},
+        },
+        "required": ["StackName", "TemplateFilename"],
+    }
 
     def prepare(
         self,
@@ -76,10 +69,8 @@ class Engine(base.BaseEngine):
             deployment_cache_dir,
             engine_cache_dir,
         )
-        # Locate the CloudFormation wrapper script that is executed in a subprocess
-        wrapper_file = path.join(
-            path.dirname(path.abspath(__file__)), "wrappers", "cloudformation.py"
-        )
+        # The CloudFormation wrapper script that is executed in a subprocess
+        wrapper_file = _WRAPPER_FILE
         # Return a command that execute the wrapper function with the path to
         # the module main script as an argument, and the worker cache folder as
         # the current working directory
@@ -90,6 +81,7 @@ class Engine(base.BaseEngine):
                 args=[python_exec, wrapper_file],
                 cwd=deployment_cache_dir,
                 assume_role=True,
+                persistent=True,
             )
         ]
 
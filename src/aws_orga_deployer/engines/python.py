@@ -6,6 +6,10 @@ from typing import Any, Dict, List
 from aws_orga_deployer.engines import base
 from aws_orga_deployer.package.store import ModuleAccountRegionKey
 
+# Path to the Python wrapper script, resolved once at import time as it never
+# changes between steps
+_WRAPPER_FILE = path.join(path.dirname(path.abspath(__file__)), "wrappers", "python.py")
+
 
 class Engine(base.BaseEngine):
     """Engine for Python modules."""
@@ -13,21 +17,11 @@ class Engine(base.BaseEngine):
     engine = "python"
     default_included_patterns = ["*.py"]
     default_excluded_patterns = []
-
-    def validate_module_config(self, module_config: Dict[str, Any]) -> None:
-        """Validate the content of the module configuration.
-
-        Args:
-            module_config: Module configuration.
-
-        Raises:
-            AssertionError
-        """
-        super().validate_module_config(module_config)
-        if "PythonExecutable" in module_config:
-            assert isinstance(
-                module_config["PythonExecutable"], str
-            ), "PythonExecutable must be a string"
+    module_config_schema = {
+        "properties": {
+            "PythonExecutable": {"type": "string"},
+        },
+    }
 
     def prepare(
         self,
@@ -65,10 +59,8 @@ class Engine(base.BaseEngine):
             deployment_cache_dir,
             engine_cache_dir,
         )
-        # Locate the Python wrapper script that is executed in a subprocess
-        wrapper_file = path.join(
-            path.dirname(path.abspath(__file__)), "wrappers", "python.py"
-        )
+        # The Python wrapper script that is executed in a subprocess
+        wrapper_file = _WRAPPER_FILE
         # Locate the main script of the module
         module_file = path.join(self.module_dir, "main.py")
         # Return a command that execute the wrapper function with the path to
@@ -81,6 +73,7 @@ class Engine(base.BaseEngine):
                 args=[python_exec, wrapper_file, module_file],
                 cwd=deployment_cache_dir,
                 assume_role=True,
+                persistent=True,
             )
         ]
 
@@ -1,14 +1,76 @@
 """Engine for Terraform modules."""
 
-import json
+import os
 import shutil
+import string
+from collections import OrderedDict
 from os import path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+try:
+    # ijson is optional and allows streaming large plan files instead of
+    # materializing the entire parsed document
+    import ijson
+except ImportError:
+    ijson = None  # type: ignore[assignment]
 
 from aws_orga_deployer import config, utils
 from aws_orga_deployer.engines import base
 from aws_orga_deployer.package.store import ModuleAccountRegionKey
 
+# Template of the aws_orga_deployer.tf file, compiled once at import time.
+# The optional assume_role, endpoints and backend endpoint blocks are
+# substituted as pre-built strings (empty when not needed)
+# Path separator cached for the f-string joins below; the deployment cache
+# directories never end with a separator
+_SEP = os.sep
+
+# Arguments and environment variable names common to all Terraform commands
+_COMMON_ARGS = ("-no-color",)
+
+_TF_TEMPLATE = string.Template(
+    'provider "aws" {\n'
+    '  region = "$region"\n'
+    "$assume_role"
+    "$endpoints"
+    "}\n"
+    "terraform {\n"
+    '  backend "s3" {\n'
+    '    bucket = "$bucket"\n'
+    '    region = "$s3_region"\n'
+    '    key = "$s3_key"\n'
+    "$backend_endpoints"
+    "  }\n"
+    "}\n"
+)
+
+# S3 backend setting emitted for each supported custom endpoint service, and
+# whether the service also requires force_path_style
+_BACKEND_ENDPOINT_KEYS = {
+    "s3": ("endpoint", True),
+    "sts": ("sts_endpoint", False),
+    "iam": ("iam_endpoint", False),
+}
+
+# Parsed plan classifications keyed by (path, size, mtime_ns), so that an
+# apply immediately following a preview does not re-parse an identical plan.
+# Bounded LRU, oldest entry evicted first
+_plan_cache: (
+    "OrderedDict[Tuple[str, int, int], Tuple[List[str], List[str], List[str]]]"
+) = OrderedDict()
+_PLAN_CACHE_MAX_ENTRIES = 256
+
+# Index of the bucket (add, change, delete) that each plan action tuple maps
+# to. The actions ("delete", "create") and ("create", "delete") correspond to
+# "change" because the resource is deleted and recreated
+_ACTION_BUCKET = {
+    ("create",): 0,
+    ("update",): 1,
+    ("delete", "create"): 1,
+    ("create", "delete"): 1,
+    ("delete",): 2,
+}
+
 
 class Engine(base.BaseEngine):
     """Engine for Terraform modules."""
@@ -16,21 +78,11 @@ class Engine(base.BaseEngine):
     engine = "terraform"
     default_included_patterns = ["*.tf"]
     default_excluded_patterns = []
-
-    def validate_module_config(self, module_config: Dict[str, Any]) -> None:
-        """Validate the content of the module configuration.
-
-        Args:
-            module_config: Module configuration.
-
-        Raises:
-            AssertionError
-        """
-        super().validate_module_config(module_config)
-        if "TerraformExecutable" in module_config:
-            assert isinstance(
-                module_config["TerraformExecutable"], str
-            ), "TerraformExecutable must be a string"
+    module_config_schema = {
+        "properties": {
+            "TerraformExecutable": {"type": "string"},
+        },
+    }
 
     def prepare(
         self,
@@ -41,9 +93,11 @@ class Engine(base.BaseEngine):
         module_config: Dict[str, Any],
         deployment_cache_dir: str,
         engine_cache_dir: str,
-    ) -> List[base.StepCommand]:
+    ) -> Iterable[base.StepCommand]:
         """Prepare Terraform files in the deployment cache directory and return
-        a list of Terraform commands to execute in subprocesses.
+        the Terraform commands to execute in subprocesses. The files are
+        prepared eagerly; the StepCommand objects are yielded lazily as the
+        caller consumes them sequentially.
 
         Args:
             key: Step key to execute.
@@ -56,7 +110,7 @@ class Engine(base.BaseEngine):
                 modules for this engine).
 
         Returns:
-            List of commands to execute in subprocesses.
+            Commands to execute in subprocesses.
         """
         # If the action is "create" or "update", copy the Terraform templates
         # that exist in the module directory to the deployment cache directory,
@@ -64,14 +118,21 @@ class Engine(base.BaseEngine):
         # the directory doesn't contain any Terraform which means that the
         # target state must not contain any resources.
         if action in ("create", "update"):
-            # The existing directory must not exist, or `copytree` fails with
-            # Python 3.7
+            # Remove any leftover from a previous run before cloning
             shutil.rmtree(deployment_cache_dir, ignore_errors=True)
-            shutil.copytree(self.module_dir, deployment_cache_dir)
-            # Create the file `terraform.tfvars.json`
-            var_filename = path.join(deployment_cache_dir, "terraform.tfvars.json")
-            with open(var_filename, "w", encoding="utf-8") as stream:
-                json.dump(variables, stream, indent=4)
+            _clone_tree(self.module_dir, deployment_cache_dir)
+            # Create the file `terraform.tfvars.json`. Remove any cloned
+            # file first so that the write never goes through an inode shared
+            # with the module sources
+            var_filename = f"{deployment_cache_dir}{_SEP}terraform.tfvars.json"
+            try:
+                os.remove(var_filename)
+            except FileNotFoundError:
+                pass
+            # Terraform parses the file the same whether indented or not, so
+            # write the compact form
+            with open(var_filename, "wb") as stream:
+                stream.write(base.json_dumps(variables))
         if action in ("destroy"):
             # If the module directory contains a file `override.tf`, copy it
             # to the deployment cache directory so that custom provider
@@ -81,123 +142,127 @@ class Engine(base.BaseEngine):
                 shutil.copy(override_filename, deployment_cache_dir)
         # Create a file `aws_orga_deployer.tf` that contains the configuration
         # of the AWS provider and of the S3 backend
-        tf_filename = path.join(deployment_cache_dir, "aws_orga_deployer.tf")
-        with open(tf_filename, "w", encoding="utf-8") as stream:
-            stream.write('provider "aws" {\n')
-            stream.write(f'  region = "{key.region}"\n')
-            # If an IAM role must be assumed in the target AWS account, it must
-            # be assumed by the provider, so that the S3 backend has permissions
-            # in the current execution account to write in the package state
-            # bucket.
-            if not module_config.get("AssumeRole") is None:
-                stream.write("  assume_role {\n")
-                stream.write(f'    role_arn = "{module_config["AssumeRole"]}"\n')
-                stream.write('    session_name = "aws-orga-deployer"\n')
-                stream.write("  }\n")
-            # Add custom endpoints for the AWS provider if needed
-            if "EndpointUrls" in module_config:
-                stream.write("  endpoints {\n")
-                for service, url in module_config["EndpointUrls"].items():
-                    stream.write(f'    {service} = "{url}"\n')
-                stream.write("  }\n")
-            stream.write("}\n")
-            stream.write("terraform {\n")
-            stream.write('  backend "s3" {\n')
-            stream.write(f'    bucket = "{config.PACKAGE["S3Bucket"]}"\n')
-            stream.write(f'    region = "{config.PACKAGE["S3Region"]}"\n')
-            s3_key = utils.get_s3_key(
-                f"terraform/{key.module}/{key.account_id}/{key.region}/terraform.tfstate"
+        tf_filename = f"{deployment_cache_dir}{_SEP}aws_orga_deployer.tf"
+        # If an IAM role must be assumed in the target AWS account, it must
+        # be assumed by the provider, so that the S3 backend has permissions
+        # in the current execution account to write in the package state
+        # bucket.
+        assume_role = ""
+        if not module_config.get("AssumeRole") is None:
+            assume_role = (
+                "  assume_role {\n"
+                f"    role_arn = \"{module_config['AssumeRole']}\"\n"
+                '    session_name = "aws-orga-deployer"\n'
+                "  }\n"
             )
-            stream.write(f'    key = "{s3_key}"\n')
-            # Add custom endpoints for S3, STS and IAM for the S3 backend
-            if "EndpointUrls" in module_config:
-                for service, url in module_config["EndpointUrls"].items():
-                    if service == "s3":
-                        stream.write(f'    endpoint = "{url}"\n')
-                        stream.write("    force_path_style = true\n")
-
-                    elif service == "sts":
-                        stream.write(f'    sts_endpoint = "{url}"\n')
-                    elif service == "iam":
-                        stream.write(f'    iam_endpoint = "{url}"\n')
-            stream.write("  }\n")
-            stream.write("}\n")
+        # Add custom endpoints for the AWS provider and for the S3 backend if
+        # needed
+        endpoints = ""
+        backend_endpoints = ""
+        if "EndpointUrls" in module_config:
+            endpoints = "  endpoints {\n"
+            for service, url in module_config["EndpointUrls"].items():
+                endpoints += f'    {service} = "{url}"\n'
+                entry = _BACKEND_ENDPOINT_KEYS.get(service)
+                if entry is not None:
+                    setting, force_path_style = entry
+                    backend_endpoints += f'    {setting} = "{url}"\n'
+                    if force_path_style:
+                        backend_endpoints += "    force_path_style = true\n"
+            endpoints += "  }\n"
+        s3_key = utils.get_s3_key(
+            f"terraform/{key.module}/{key.account_id}/{key.region}/terraform.tfstate"
+        )
+        new_content = _TF_TEMPLATE.substitute(
+            region=key.region,
+            assume_role=assume_role,
+            endpoints=endpoints,
+            bucket=config.PACKAGE["S3Bucket"],
+            s3_region=config.PACKAGE["S3Region"],
+            s3_key=s3_key,
+            backend_endpoints=backend_endpoints,
+        ).encode()
+        # Skip the write if the content is unchanged from a previous run, so
+        # that the file mtime is preserved and terraform does not re-checksum
+        # its configuration needlessly
+        try:
+            with open(tf_filename, "rb") as tf_stream:
+                old_content = tf_stream.read()
+        except FileNotFoundError:
+            old_content = b""
+        if new_content != old_content:
+            # Write to a temporary file and rename it into place, so that the
+            # write never truncates an inode shared with the module sources
+            tmp_filename = f"{tf_filename}.tmp"
+            with open(tmp_filename, "wb") as stream:
+                stream.write(new_content)
+            os.replace(tmp_filename, tf_filename)
         # Get the path to the Terraform executable
         terraform_exec = "terraform"
         if not module_config.get("TerraformExecutable") is None:
             terraform_exec = module_config["TerraformExecutable"]
-        # Set arguments and environment variables that are common to all
-        # Terraform commands
-        common_args = ["-no-color"]
+        # Environment variables common to all Terraform commands; the common
+        # arguments are a module-level constant
         common_env = {
             "TF_PLUGIN_CACHE_DIR": engine_cache_dir,
             "TF_PLUGIN_CACHE_MAY_BREAK_DEPENDENCY_LOCK_FILE": "true",
         }
-        # `terraform init` is needed whether the command or the action
-        commands = [
-            base.StepCommand(
+
+        def iter_commands() -> Iterator[base.StepCommand]:
+            # `terraform init` is needed whether the command or the action
+            yield base.StepCommand(
                 name="init",
-                args=[terraform_exec, "init", *common_args],
+                args=(terraform_exec, "init") + _COMMON_ARGS,
                 cwd=deployment_cache_dir,
                 assume_role=False,
                 env=common_env,
             )
-        ]
-        # The following commands are needed for both "preview" and "apply"
-        # commands
-        commands += [
-            base.StepCommand(
+            # The following commands are needed for both "preview" and "apply"
+            # commands
+            yield base.StepCommand(
                 name="plan",
-                args=[terraform_exec, "plan", "-out=tfplan", *common_args],
+                args=(terraform_exec, "plan", "-out=tfplan") + _COMMON_ARGS,
                 cwd=deployment_cache_dir,
                 assume_role=False,
                 env=common_env,
-            ),
+            )
             # The output of the following command must be stored in a file so
             # that the `postprocess` is able to identify the resources to
             # add, change or delete
-            base.StepCommand(
+            yield base.StepCommand(
                 name="get plan in JSON",
-                args=[terraform_exec, "show", "-json", "tfplan", *common_args],
+                args=(terraform_exec, "show", "-json", "tfplan") + _COMMON_ARGS,
                 cwd=deployment_cache_dir,
                 assume_role=False,
                 env=common_env,
-                stdout_file=path.join(deployment_cache_dir, "plan.json"),
-            ),
-        ]
-        # The following commands are only run if command is "apply" to apply
-        # the plan and get outputs
-        if command == "apply":
-            commands += [
-                base.StepCommand(
+                stdout_file=f"{deployment_cache_dir}{_SEP}plan.json",
+            )
+            # The following commands are only run if command is "apply" to
+            # apply the plan and get outputs
+            if command == "apply":
+                yield base.StepCommand(
                     name="apply plan",
-                    args=[
-                        terraform_exec,
-                        "apply",
-                        "-auto-approve",
-                        *common_args,
-                        "tfplan",
-                    ],
+                    args=(terraform_exec, "apply", "-auto-approve")
+                    + _COMMON_ARGS
+                    + ("tfplan",),
                     cwd=deployment_cache_dir,
                     assume_role=False,
                     env=common_env,
                 )
-            ]
-            # If the action is not "destroy", get the outputs from the Terraform
-            # state. The output must be stored in a file, so that `postprocess`
-            # can read the outputs.
-            if action in ("create", "update"):
-                commands += [
-                    base.StepCommand(
+                # If the action is not "destroy", get the outputs from the
+                # Terraform state. The output must be stored in a file, so
+                # that `postprocess` can read the outputs.
+                if action in ("create", "update"):
+                    yield base.StepCommand(
                         name="get outputs",
-                        args=[terraform_exec, "output", "-json", *common_args],
+                        args=(terraform_exec, "output", "-json") + _COMMON_ARGS,
                         cwd=deployment_cache_dir,
                         assume_role=False,
                         env=common_env,
-                        stdout_file=path.join(deployment_cache_dir, "output.json"),
-                    ),
-                ]
-        return commands
+                        stdout_file=f"{deployment_cache_dir}{_SEP}output.json",
+                    )
+
+        return iter_commands()
 
     def postprocess(
         self,
@@ -222,32 +287,14 @@ class Engine(base.BaseEngine):
         """
         # Identify the resources to add, change or delete from the Terraform
         # plan
-        res_add = []
-        res_change = []
-        res_delete = []
-        plan_file = path.join(deployment_cache_dir, "plan.json")
-        with open(plan_file, "r", encoding="utf-8") as stream:
-            content = json.load(stream)
-            for change in content.get("resource_changes", []):
-                actions = change["change"]["actions"]
-                if actions == ["create"]:
-                    res_add.append(change["address"])
-                elif actions == ["delete"]:
-                    res_delete.append(change["address"])
-                # Actions ["delete", "create"] or ["create", "delete"]
-                # correspond to "update" because the resource is deleted and
-                # recreated
-                elif actions in (
-                    ["update"],
-                    ["delete", "create"],
-                    ["create", "delete"],
-                ):
-                    res_change.append(change["address"])
+        plan_file = f"{deployment_cache_dir}{_SEP}plan.json"
+        res_add, res_change, res_delete = _classify_plan(plan_file)
+        made_changes = bool(res_add or res_change or res_delete)
         # If the command is "preview", the outputs must be named "to add", "to
         # change" or to "to delete" and no outputs is needed
         if command == "preview":
             return base.StepOutcome(
-                made_changes=len(res_add + res_change + res_delete) > 0,
+                made_changes=made_changes,
                 result=(
                     f"{len(res_add)} resources to add, "
                     f"{len(res_change)} to change, "
@@ -263,14 +310,19 @@ class Engine(base.BaseEngine):
         # "changed" or "deleted" and outputs must be provided if action is
         # "create" or "update"
         if action in ("create", "update"):
-            output_file = path.join(deployment_cache_dir, "output.json")
-            with open(output_file, "r", encoding="utf-8") as stream:
-                content = json.load(stream)
+            output_file = f"{deployment_cache_dir}{_SEP}output.json"
+            # An empty outputs file is "{}" plus an optional newline; skip the
+            # parse entirely in that common case
+            if os.path.getsize(output_file) <= 3:
+                outputs = {}
+            else:
+                with open(output_file, "rb") as stream:
+                    content = base.json_loads(stream.read())
                 outputs = {key: value["value"] for key, value in content.items()}
         else:
             outputs = None
         return base.StepOutcome(
-            made_changes=len(res_add + res_change + res_delete) > 0,
+            made_changes=made_changes,
             result=(
                 f"{len(res_add)} resources added, "
                 f"{len(res_change)} changed, "
@@ -283,3 +335,82 @@ class Engine(base.BaseEngine):
             },
             outputs=outputs,
         )
+
+
+# Files that this engine or Terraform itself may rewrite in the deployment
+# cache directory. They must never be hardlinked from the module sources, as
+# writing through the shared inode would corrupt the user's module files
+_NEVER_LINK = frozenset(
+    ("terraform.tfvars.json", "aws_orga_deployer.tf", ".terraform.lock.hcl")
+)
+
+
+def _clone_tree(src: str, dst: str) -> None:
+    """Replicate a directory tree into `dst` using hardlinks, so that module
+    files are not copied byte-by-byte for every deployment. Falls back to a
+    regular copy when hardlinks are not possible (e.g. the deployment cache is
+    on another filesystem). Files that may be rewritten in the deployment
+    cache directory are always copied, so that the module source files are
+    never modified through a shared inode.
+
+    Args:
+        src: Path to the source directory.
+        dst: Path to the destination directory, created if needed.
+    """
+    os.makedirs(dst, exist_ok=True)
+    with os.scandir(src) as entries:
+        for entry in entries:
+            dst_path = path.join(dst, entry.name)
+            if entry.is_dir():
+                _clone_tree(entry.path, dst_path)
+            elif entry.name in _NEVER_LINK:
+                shutil.copy2(entry.path, dst_path)
+            else:
+                try:
+                    os.link(entry.path, dst_path)
+                except OSError:
+                    shutil.copy2(entry.path, dst_path)
+
+
+def _classify_plan(plan_file: str) -> Tuple[List[str], List[str], List[str]]:
+    """Return the addresses of the resources to add, change and delete in a
+    Terraform plan file. The classification is cached on the file stat
+    fingerprint, so that an apply that follows a preview on an unchanged plan
+    does not parse the file again.
+
+    Args:
+        plan_file: Path to the plan file in JSON format.
+    """
+    stat = os.stat(plan_file)
+    cache_key = (plan_file, stat.st_size, stat.st_mtime_ns)
+    cached = _plan_cache.get(cache_key)
+    if cached is not None:
+        _plan_cache.move_to_end(cache_key)
+        return cached
+    buckets: Tuple[List[str], List[str], List[str]] = ([], [], [])
+    for change in _iter_resource_changes(plan_file):
+        # A dict lookup on the actions tuple replaces a cascade of list
+        # comparisons for each resource change
+        bucket = _ACTION_BUCKET.get(tuple(change["change"]["actions"]))
+        if bucket is not None:
+            buckets[bucket].append(change["address"])
+    _plan_cache[cache_key] = buckets
+    if len(_plan_cache) > _PLAN_CACHE_MAX_ENTRIES:
+        _plan_cache.popitem(last=False)
+    return buckets
+
+
+def _iter_resource_changes(plan_file: str) -> Iterator[Dict[str, Any]]:
+    """Iterate over the `resource_changes` entries of a Terraform plan file.
+    When ijson is available, the entries are streamed one at a time so that
+    large plans are never fully materialized in memory.
+
+    Args:
+        plan_file: Path to the plan file in JSON format.
+    """
+    with open(plan_file, "rb") as stream:
+        if ijson is not None:
+            yield from ijson.items(stream, "resource_changes.item")
+        else:
+            content = base.json_loads(stream.read())
+            yield from content.get("resource_changes", [])
@@ -1,11 +1,28 @@
 """Base functions for wrapper scripts."""
 
+import contextlib
+import io
 import json
+import os
+import sys
+import traceback
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 
+try:
+    # orjson is optional and considerably faster than the standard library
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
 
-@dataclass
+# `slots=True` removes the per-instance __dict__; only supported by
+# dataclasses from Python 3.10
+_DATACLASS_SLOTS: Dict[str, bool] = (
+    {"slots": True} if sys.version_info >= (3, 10) else {}
+)
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class WrapperInputs:
     """Store inputs that are read from the JSON file `input.json`.
 
@@ -41,8 +58,11 @@ def read_wrapper_inputs() -> WrapperInputs:
     Returns:
         WrapperInputs object.
     """
-    with open("input.json", "r", encoding="utf-8") as stream:
-        content = json.load(stream)
+    with open("input.json", "rb") as stream:
+        if orjson is not None:
+            content = orjson.loads(stream.read())
+        else:
+            content = json.load(stream)
         return WrapperInputs(
             module=content["Deployment"]["Module"],
             account_id=content["Deployment"]["AccountId"],
@@ -80,5 +100,56 @@ def write_wrapper_outputs(
         "DetailedResults": detailed_results,
         "Outputs": outputs,
     }
-    with open("output.json", "w", encoding="utf-8") as stream:
-        json.dump(output_content, stream)
+    if orjson is not None:
+        with open("output.json", "wb") as stream:
+            stream.write(orjson.dumps(output_content))
+    else:
+        with open("output.json", "w", encoding="utf-8") as stream:
+            json.dump(output_content, stream)
+
+
+def worker_loop(handler: Callable[[List[str]], None]) -> None:
+    """Service newline-delimited JSON jobs from stdin until EOF, so that a
+    single wrapper process can be reused for many steps and the interpreter
+    and boto3 import costs are paid once.
+
+    Each job is a JSON object with the working directory, the environment
+    variables and the wrapper arguments of one invocation. The job stdout and
+    stderr are captured and returned in the JSON result line written to the
+    original stdout, which keeps the job channel parseable.
+
+    Args:
+        handler: Function that executes one job, given the wrapper arguments.
+    """
+    # Reserve the original stdout for the job results and point the file
+    # descriptor 1 at stderr: the redirections below only capture Python-level
+    # writes, and a write to the file descriptor 1 by a C extension or by a
+    # subprocess spawned by a job would otherwise corrupt the job channel
+    result_stream = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        os.chdir(job["cwd"])
+        os.environ.clear()
+        os.environ.update(job["env"])
+        out_buffer = io.StringIO()
+        err_buffer = io.StringIO()
+        # pylint: disable=broad-exception-caught
+        # A job failure must not terminate the worker process
+        try:
+            with contextlib.redirect_stdout(out_buffer):
+                with contextlib.redirect_stderr(err_buffer):
+                    handler(job["args"])
+            succeeded = True
+        except (Exception, SystemExit):
+            succeeded = False
+            traceback.print_exc(file=err_buffer)
+        result = {
+            "ok": succeeded,
+            "stdout": out_buffer.getvalue(),
+            "stderr": err_buffer.getvalue(),
+        }
+        result_stream.write(json.dumps(result) + "\n")
+        result_stream.flush()
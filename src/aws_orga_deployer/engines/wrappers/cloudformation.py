@@ -1,13 +1,20 @@
 """Wrapper of CloudFormation modules that is executed in a subprocess."""
 
+import functools
+import hashlib
+import json
+import os
 import random
 import string
+import sys
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from os import path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 import boto3
 import botocore
+from botocore.config import Config
 
 from aws_orga_deployer.engines.wrappers import base
 
@@ -18,24 +25,164 @@ CFN_CAPABILITIES: List[str] = [
     "CAPABILITY_AUTO_EXPAND",
 ]
 
+# Bounds of the exponential backoff applied to the wait loops
+_MIN_POLL_SECONDS = 3.0
+_MAX_POLL_SECONDS = 30.0
 
-def main() -> None:
-    """Main function."""
+# Error codes returned when API requests are throttled
+_THROTTLING_ERROR_CODES = ("Throttling", "ThrottlingException", "RequestLimitExceeded")
 
-    def check_stack_exists() -> bool:
+# Stack and change-set statuses form small closed enums. Set membership makes
+# the wait loops cheaper than repeated suffix scans, and avoids substring
+# checks that could accidentally match rollback statuses
+_CHANGE_SET_SUCCESS = frozenset({"CREATE_COMPLETE"})
+_CHANGE_SET_WAITING = frozenset({"CREATE_PENDING", "CREATE_IN_PROGRESS"})
+_STACK_APPLY_SUCCESS = frozenset(
+    {"CREATE_COMPLETE", "UPDATE_COMPLETE", "IMPORT_COMPLETE"}
+)
+_STACK_DELETE_SUCCESS = frozenset({"DELETE_COMPLETE"})
+_STACK_IN_PROGRESS = frozenset({
+    "CREATE_IN_PROGRESS",
+    "UPDATE_IN_PROGRESS",
+    "UPDATE_COMPLETE_CLEANUP_IN_PROGRESS",
+    "DELETE_IN_PROGRESS",
+    "REVIEW_IN_PROGRESS",
+    "IMPORT_IN_PROGRESS",
+    "ROLLBACK_IN_PROGRESS",
+    "UPDATE_ROLLBACK_IN_PROGRESS",
+    "UPDATE_ROLLBACK_COMPLETE_CLEANUP_IN_PROGRESS",
+    "IMPORT_ROLLBACK_IN_PROGRESS",
+})
+_STACK_TERMINAL = frozenset({
+    "CREATE_COMPLETE",
+    "CREATE_FAILED",
+    "UPDATE_COMPLETE",
+    "UPDATE_FAILED",
+    "DELETE_COMPLETE",
+    "DELETE_FAILED",
+    "ROLLBACK_COMPLETE",
+    "ROLLBACK_FAILED",
+    "UPDATE_ROLLBACK_COMPLETE",
+    "UPDATE_ROLLBACK_FAILED",
+    "IMPORT_COMPLETE",
+    "IMPORT_ROLLBACK_COMPLETE",
+    "IMPORT_ROLLBACK_FAILED",
+})
+
+
+def _build_stack_parameters(items: Any) -> List[Dict[str, Any]]:
+    """Build the stack parameter list from (name, value) pairs. List or tuple
+    values are joined into the comma-separated form expected by
+    CloudFormation. The exact-class checks and the hoisted bound methods keep
+    the loop cheap when there are hundreds of variables.
+    """
+    out: List[Dict[str, Any]] = []
+    append = out.append
+    join = ",".join
+    for name, value in items:
+        cls = value.__class__
+        if cls is list or cls is tuple:
+            value = join(value)
+        append({
+            "ParameterKey": name,
+            "ParameterValue": value,
+            "UsePreviousValue": False,
+        })
+    return out
+
+
+@functools.lru_cache(maxsize=128)
+def _cached_stack_parameters(
+    items: Tuple[Tuple[str, Any], ...]
+) -> List[Dict[str, Any]]:
+    """Memoized variant of `_build_stack_parameters`, so that wrappers reused
+    within one process do not re-serialize identical variable sets.
+    """
+    return _build_stack_parameters(items)
+
+
+def _next_poll_delay(delay: float) -> float:
+    """Return the next polling delay, growing exponentially up to the cap."""
+    return min(delay * 1.5, _MAX_POLL_SECONDS)
+
+
+def _sleep_with_jitter(delay: float) -> None:
+    """Sleep for the given delay plus random jitter, so that concurrent
+    wrappers polling the same APIs do not fire in lockstep.
+    """
+    time.sleep(delay + random.uniform(0, 0.5 * delay))
+
+
+def _is_throttling_error(err: botocore.exceptions.ClientError) -> bool:
+    """Return True if the boto3 error is a throttling error."""
+    return err.response.get("Error", {}).get("Code") in _THROTTLING_ERROR_CODES
+
+
+# The adaptive retry mode rate-limits the client with a token bucket when
+# requests are throttled, which suits many wrappers driving stacks in parallel
+_BOTO3_CONFIG = Config(
+    retries={"mode": "adaptive", "max_attempts": 10},
+    connect_timeout=5,
+    read_timeout=30,
+)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Main function.
+
+    Args:
+        argv: Wrapper arguments. Unused, as the CloudFormation wrapper takes
+            no arguments, but accepted for compatibility with the worker loop.
+    """
+    # pylint: disable=unused-argument
+
+    def describe_stack(force_refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """Return the stack description, or None if the stack does not exist.
+        The last response is memoized so that consecutive lookups within the
+        same wrapper invocation do not repeat identical DescribeStacks calls;
+        pass `force_refresh` after an operation that changes the stack or
+        within a wait loop.
+        """
+        if force_refresh or "stack" not in stack_cache:
+            try:
+                stack_cache["stack"] = client.describe_stacks(StackName=stack_name)[
+                    "Stacks"
+                ][0]
+            except botocore.exceptions.ClientError as err:
+                if "does not exist" in str(err):
+                    stack_cache["stack"] = None
+                else:
+                    raise
+        return stack_cache["stack"]
+
+    def check_stack_exists(force_refresh: bool = False) -> bool:
         """Return True to the stack exists."""
+        _stack = describe_stack(force_refresh)
+        if _stack is None:
+            return False
+        # The stack has the status REVIEW_IN_PROGRESS when change sets
+        # were created but the stack has not yet been created
+        return _stack["StackStatus"] != "REVIEW_IN_PROGRESS"
+
+    def probe_stack_exists() -> bool:
+        """Return True if the stack exists, probing with
+        DescribeStackResources which is less throttle-prone than
+        DescribeStacks when many stacks are deployed concurrently.
+        """
         try:
-            _stack = client.describe_stacks(StackName=stack_name)["Stacks"][0]
-            _status = _stack["StackStatus"]
-            # The stack has the status REVIEW_IN_PROGRESS when change sets
-            # were created but the stack has not yet been created
-            if _status == "REVIEW_IN_PROGRESS":
-                return False
-            return True
+            resources = client.describe_stack_resources(StackName=stack_name)[
+                "StackResources"
+            ]
         except botocore.exceptions.ClientError as err:
             if "does not exist" in str(err):
                 return False
-            raise err
+            raise
+        if resources:
+            return True
+        # A stack without resources may be in REVIEW_IN_PROGRESS (change sets
+        # created but the stack not yet created); only this corner case needs
+        # DescribeStacks
+        return check_stack_exists()
 
     def get_additional_boto3_params() -> Dict[str, Any]:
         """Retrieve and returns the list of additional parameters that must be
@@ -57,43 +204,184 @@ def main() -> None:
         except OSError as err:
             raise ValueError(f"Cannot read the template at {filepath}") from err
 
-    def get_stack_status() -> str:
+    def get_template_argument() -> Dict[str, str]:
+        """Return the template argument for `create_change_set`: the inline
+        body, or a TemplateURL when a staging bucket is configured. Staging
+        keeps the API request small, so retries of a throttled call do not
+        re-send the whole template, and the content-addressed key makes the
+        upload idempotent.
+        """
+        body = get_template_body()
+        bucket = inputs.module_config.get("TemplateStagingBucket")
+        if bucket is None:
+            return {"TemplateBody": body}
+        digest = hashlib.sha256(body.encode()).hexdigest()
+        s3_key = f"templates/{digest}.template"
+        s3_endpoint_config = {}
+        if "s3" in inputs.module_config.get("EndpointUrls", {}):
+            s3_endpoint_config = {
+                "endpoint_url": inputs.module_config["EndpointUrls"]["s3"]
+            }
+        s3_client = boto3.client(
+            "s3", region_name=inputs.region, config=_BOTO3_CONFIG, **s3_endpoint_config
+        )
+        try:
+            s3_client.head_object(Bucket=bucket, Key=s3_key)
+            print(f"Reusing the staged template at s3://{bucket}/{s3_key}")
+        except botocore.exceptions.ClientError:
+            s3_client.put_object(Bucket=bucket, Key=s3_key, Body=body.encode())
+            print(f"Staged the template at s3://{bucket}/{s3_key}")
+        return {
+            "TemplateURL": f"https://{bucket}.s3.{inputs.region}.amazonaws.com/{s3_key}"
+        }
+
+    def deployment_hash_file() -> str:
+        """Return the path of the file that stores the hash of the template
+        and parameters last applied to the stack. The file lives in the engine
+        cache directory, which persists across runs, keyed by account, region
+        and stack name.
+        """
+        return path.join(
+            inputs.engine_cache_dir,
+            "stack-hashes",
+            inputs.account_id,
+            inputs.region,
+            f"{stack_name}.hash",
+        )
+
+    def compute_deployment_hash() -> str:
+        """Return a hash of the template body and the stack parameters, used
+        to detect that a deployment is identical to the last applied one.
+        """
+        return hashlib.blake2b(
+            get_template_body().encode()
+            + json.dumps(prepare_stack_parameters(), sort_keys=True).encode(),
+            digest_size=16,
+        ).hexdigest()
+
+    def read_deployment_hash() -> Optional[str]:
+        """Return the hash of the last applied deployment, or None."""
+        try:
+            with open(deployment_hash_file(), "r", encoding="utf-8") as stream:
+                return stream.read().strip()
+        except OSError:
+            return None
+
+    def write_deployment_hash(value: str) -> None:
+        """Store the hash of the deployment that was just applied."""
+        filename = deployment_hash_file()
+        os.makedirs(path.dirname(filename), exist_ok=True)
+        with open(filename, "w", encoding="utf-8") as stream:
+            stream.write(value)
+
+    def clear_deployment_hash() -> None:
+        """Forget the stored hash, after the stack was deleted."""
+        try:
+            os.remove(deployment_hash_file())
+        except OSError:
+            pass
+
+    def wait_for_stack_events(queue_url: str, stack_id: str) -> Optional[str]:
+        """Wait for a terminal stack status by long-polling the SQS queue
+        subscribed to the stack notification topic, instead of polling
+        DescribeStacks. Returns the terminal status of the stack resource,
+        or None after one hour so that the caller can fall back to polling.
+
+        The same queue may receive the events of concurrent deployments of
+        this module to other accounts or regions, so only the events of the
+        stack identified by `stack_id` are consumed; other events are left
+        invisible until their own waiter receives them back.
+        """
+        sqs = boto3.client("sqs", region_name=inputs.region, config=_BOTO3_CONFIG)
+        deadline = time.monotonic() + 3600
+        while time.monotonic() < deadline:
+            response = sqs.receive_message(
+                QueueUrl=queue_url, WaitTimeSeconds=20, MaxNumberOfMessages=10
+            )
+            for message in response.get("Messages", []):
+                body = message["Body"]
+                # The notification may be wrapped in an SNS envelope whose
+                # "Message" field contains the key='value' lines
+                try:
+                    body = json.loads(body)["Message"]
+                except (ValueError, KeyError, TypeError):
+                    pass
+                fields = dict(
+                    line.split("=", 1) for line in body.splitlines() if "=" in line
+                )
+                # Leave the events of other stacks in the queue for their own
+                # waiter; they become visible again after the visibility
+                # timeout
+                if fields.get("StackId", "").strip("'") != stack_id:
+                    continue
+                status = fields.get("ResourceStatus", "").strip("'")
+                logical_id = fields.get("LogicalResourceId", "").strip("'")
+                sqs.delete_message(
+                    QueueUrl=queue_url, ReceiptHandle=message["ReceiptHandle"]
+                )
+                # Only the event of the stack itself is terminal; resource
+                # events are progress notifications
+                if logical_id == stack_name and status in _STACK_TERMINAL:
+                    return status
+        return None
+
+    def get_stack_status(force_refresh: bool = False) -> str:
         """Returns the stack status."""
-        _stack = client.describe_stacks(StackName=stack_name)["Stacks"][0]
-        return _stack["StackStatus"]
+        stack = describe_stack(force_refresh)
+        assert stack is not None
+        return stack["StackStatus"]
 
     def get_stack_outputs() -> Dict[str, str]:
-        """Returns the stack outputs."""
-        time.sleep(2)
-        _stack = client.describe_stacks(StackName=stack_name)["Stacks"][0]
-        if not "Outputs" in _stack:
+        """Returns the stack outputs, read from the memoized stack
+        description. In the apply path, the terminal wait-loop poll already
+        fetched the final description including the outputs, so no additional
+        DescribeStacks call or settling delay is needed.
+        """
+        _stack = describe_stack()
+        if _stack is None or "Outputs" not in _stack:
             return {}
         return {
             output["OutputKey"]: output["OutputValue"] for output in _stack["Outputs"]
         }
 
     def get_stack_resources() -> List[str]:
-        """Returns the list of stack resources."""
-        result = []
-        paginator = client.get_paginator("list_stack_resources")
-        pages = paginator.paginate(StackName=stack_name)
-        for page in pages:
-            for resource in page["StackResourceSummaries"]:
-                result.append(resource["LogicalResourceId"])
+        """Returns the list of stack resources. The next page is requested as
+        soon as the current one is received, so that the network round-trip
+        overlaps with the processing of the current page.
+        """
+        result: List[str] = []
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            future: Optional[Future] = executor.submit(
+                client.list_stack_resources, StackName=stack_name
+            )
+            while future is not None:
+                page = future.result()
+                next_token = page.get("NextToken")
+                if next_token is None:
+                    future = None
+                else:
+                    future = executor.submit(
+                        client.list_stack_resources,
+                        StackName=stack_name,
+                        NextToken=next_token,
+                    )
+                for resource in page["StackResourceSummaries"]:
+                    result.append(resource["LogicalResourceId"])
         return result
 
     def prepare_stack_parameters() -> List[Dict[str, Any]]:
         """Generate and return a list of stack parameters from the input
         variables.
         """
-        return [
-            {
-                "ParameterKey": name,
-                "ParameterValue": ",".join(value) if isinstance(value, list) else value,
-                "UsePreviousValue": False,
-            }
-            for name, value in inputs.variables.items()
-        ]
+        try:
+            cache_key = tuple(
+                (name, tuple(value) if isinstance(value, list) else value)
+                for name, value in inputs.variables.items()
+            )
+            return _cached_stack_parameters(cache_key)
+        except TypeError:
+            # Variables with unhashable values cannot be used as a cache key
+            return _build_stack_parameters(inputs.variables.items())
 
     def delete_change_set() -> None:
         """Try to delete the change set, but ignore any exceptions raised by
@@ -104,6 +392,8 @@ def main() -> None:
         except botocore.exceptions.ClientError:
             pass
 
+    # Memoized DescribeStacks response shared by the nested helpers
+    stack_cache: Dict[str, Any] = {}
     # Read the inputs from the JSON file `input.json` and create a boto3 client
     # for the module region
     inputs = base.read_wrapper_inputs()
@@ -114,12 +404,15 @@ def main() -> None:
             endpoint_url = inputs.module_config["EndpointUrls"]["cloudformation"]
             endpoint_config = {"endpoint_url": endpoint_url}
     client = boto3.client(
-        "cloudformation", region_name=inputs.region, **endpoint_config
+        "cloudformation",
+        region_name=inputs.region,
+        config=_BOTO3_CONFIG,
+        **endpoint_config,
     )
     # Retrieve the stack name
     stack_name = inputs.module_config["StackName"]
     # Check if the stack already exists
-    stack_exists = check_stack_exists()
+    stack_exists = probe_stack_exists()
     if stack_exists is True:
         print("The stack {stack_name} exists")
     else:
@@ -127,14 +420,35 @@ def main() -> None:
     #######################################
     # If the action is "create" or "update"
     if inputs.action in ("create", "update"):
+        # Skip the change set entirely if the template and parameters are
+        # identical to those last applied and the stack is healthy, which
+        # saves the change-set API calls and the wait for its creation
+        deployment_hash = compute_deployment_hash()
+        if (
+            stack_exists
+            and deployment_hash == read_deployment_hash()
+            and get_stack_status() in _STACK_APPLY_SUCCESS
+        ):
+            print("The template and parameters are unchanged since last applied")
+            base.write_wrapper_outputs(
+                made_changes=False,
+                result="No changes to be made",
+                detailed_results=None,
+                outputs=get_stack_outputs() if inputs.command == "apply" else None,
+            )
+            return
         # Create a change set to identify the list of resources to add,
         # change or delete. The name of the change set is the name of the
         # stack, prepended by 5 random letters
         random_suffix = "".join(random.choices(string.ascii_lowercase, k=5))
         change_set_name = stack_name + "-" + random_suffix
-        change_set_id = client.create_change_set(
+        notification_config = {}
+        if "NotificationTopicArn" in inputs.module_config:
+            notification_config = {
+                "NotificationARNs": [inputs.module_config["NotificationTopicArn"]]
+            }
+        change_set_response = client.create_change_set(
             StackName=stack_name,
-            TemplateBody=get_template_body(),
             UsePreviousTemplate=False,
             Parameters=prepare_stack_parameters(),
             Capabilities=CFN_CAPABILITIES,
@@ -143,20 +457,37 @@ def main() -> None:
             ChangeSetType="UPDATE" if stack_exists else "CREATE",
             IncludeNestedStacks=False,
             OnStackFailure="ROLLBACK" if stack_exists else "DELETE",
+            **notification_config,
+            **get_template_argument(),
             **get_additional_boto3_params(),
-        )["Id"]
+        )
+        change_set_id = change_set_response["Id"]
+        stack_id = change_set_response["StackId"]
         print(f"Creating the change set {change_set_name}")
-        # Wait until the change set completes
+        # Wait until the change set completes, backing off while the status
+        # does not change and when requests are throttled
+        delay = _MIN_POLL_SECONDS
+        last_status = None
         while True:
-            time.sleep(3)
-            change_set = client.describe_change_set(ChangeSetName=change_set_id)
+            _sleep_with_jitter(delay)
+            try:
+                change_set = client.describe_change_set(ChangeSetName=change_set_id)
+            except botocore.exceptions.ClientError as err:
+                if _is_throttling_error(err):
+                    delay = _next_poll_delay(delay)
+                    continue
+                raise
             status = change_set["Status"]
+            delay = (
+                _MIN_POLL_SECONDS if status != last_status else _next_poll_delay(delay)
+            )
+            last_status = status
             # Stop waiting if the change set has completed
-            if status.endswith("COMPLETE"):
+            if status in _CHANGE_SET_SUCCESS:
                 print("The creation of the change set has completed")
                 break
             # Wait if the status is still pending or in progress
-            if status.endswith("IN_PROGRESS") or status.endswith("PENDING"):
+            if status in _CHANGE_SET_WAITING:
                 print("Waiting for the change set creation to complete")
                 continue
             # For any other status
@@ -173,6 +504,7 @@ def main() -> None:
             reason = change_set.get("StatusReason")
             if "information didn't contain changes" in reason:
                 print("No changes to be made")
+                write_deployment_hash(deployment_hash)
                 base.write_wrapper_outputs(
                     made_changes=False,
                     result="No changes to be made",
@@ -183,19 +515,20 @@ def main() -> None:
             # Raise an error if the change set failed for another reason
             print(f"The creation of the change set failed: {status} {reason}")
             raise RuntimeError("Failed to evaluate the changes to be made")
-        # Identify the resources to add, change or delete
-        res_add = []
-        res_change = []
-        res_delete = []
+        # Identify the resources to add, change or delete, routing each
+        # change through a dict lookup on the action rather than a branch
+        # ladder
+        buckets: Dict[str, List[str]] = {"Add": [], "Modify": [], "Remove": []}
+        discard: List[str] = []
         for change in change_set["Changes"]:
             if change["Type"] == "Resource":
                 rsc_change = change["ResourceChange"]
-                if rsc_change["Action"] == "Add":
-                    res_add.append(rsc_change["LogicalResourceId"])
-                elif rsc_change["Action"] == "Modify":
-                    res_change.append(rsc_change["LogicalResourceId"])
-                elif rsc_change["Action"] == "Remove":
-                    res_delete.append(rsc_change["LogicalResourceId"])
+                buckets.get(rsc_change["Action"], discard).append(
+                    rsc_change["LogicalResourceId"]
+                )
+        res_add = buckets["Add"]
+        res_change = buckets["Modify"]
+        res_delete = buckets["Remove"]
         # If the command is preview, the outcomes must be named "to add",
         # "to change", "to delete" and there are no outputs to return
         if inputs.command == "preview":
@@ -213,27 +546,63 @@ def main() -> None:
                     "ResourcesToDelete": res_delete,
                 },
             )
+            # Delete the change set, which was not executed
+            print("Deleting the change set")
+            delete_change_set()
         # If the command is preview, the outcomes must be named "added",
         # "changed", "deleted" and outputs must be returned
         elif inputs.command == "apply":
             # Execute the change set
             print("Executing the change set")
             client.execute_change_set(ChangeSetName=change_set_id)
-            # Wait until the stack updates completes
-            while True:
-                time.sleep(3)
-                status = get_stack_status()
-                if status.endswith("COMPLETE") and not "ROLLBACK" in status:
+            # Wait for the stack events via SQS when a notification queue is
+            # configured, which replaces the DescribeStacks polling entirely;
+            # fall back to polling otherwise, if the events time out, or if
+            # the stack has not settled yet when the event is processed
+            completed = False
+            queue_url = inputs.module_config.get("NotificationQueueUrl")
+            if (
+                queue_url is not None
+                and wait_for_stack_events(queue_url, stack_id) is not None
+            ):
+                status = get_stack_status(force_refresh=True)
+                if status in _STACK_APPLY_SUCCESS:
                     print("The execution of the change set has completed")
-                    break
-                # Wait if the status is still pending or in progress
-                if status.endswith("IN_PROGRESS"):
-                    print("Waiting for the change set execution to complete")
-                    continue
-                # If the status is unknown, raise an error
-                delete_change_set()
-                print(f"The execution of the change set failed: {status}")
-                raise RuntimeError("Failed to apply the changes to be made")
+                    completed = True
+                elif status not in _STACK_IN_PROGRESS:
+                    delete_change_set()
+                    print(f"The execution of the change set failed: {status}")
+                    raise RuntimeError("Failed to apply the changes to be made")
+            if not completed:
+                # Wait until the stack updates completes
+                delay = _MIN_POLL_SECONDS
+                last_status = None
+                while True:
+                    _sleep_with_jitter(delay)
+                    try:
+                        status = get_stack_status(force_refresh=True)
+                    except botocore.exceptions.ClientError as err:
+                        if _is_throttling_error(err):
+                            delay = _next_poll_delay(delay)
+                            continue
+                        raise
+                    delay = (
+                        _MIN_POLL_SECONDS
+                        if status != last_status
+                        else _next_poll_delay(delay)
+                    )
+                    last_status = status
+                    if status in _STACK_APPLY_SUCCESS:
+                        print("The execution of the change set has completed")
+                        break
+                    # Wait if the status is still pending or in progress
+                    if status in _STACK_IN_PROGRESS:
+                        print("Waiting for the change set execution to complete")
+                        continue
+                    # If the status is unknown, raise an error
+                    delete_change_set()
+                    print(f"The execution of the change set failed: {status}")
+                    raise RuntimeError("Failed to apply the changes to be made")
             # Write the outputs assuming that the changes made are those
             # identified in the change set
             base.write_wrapper_outputs(
@@ -250,9 +619,11 @@ def main() -> None:
                 },
                 outputs=get_stack_outputs(),
             )
-        # Delete the change set and exit
-        print("Deleting the change set")
-        delete_change_set()
+            # Remember what was applied, so that an identical re-deployment
+            # can skip the change set entirely
+            write_deployment_hash(deployment_hash)
+            # No need to delete the change set: CloudFormation garbage
+            # collects executed change sets on its own
     #######################################
     # If the action is "destroy"
     elif inputs.action == "destroy":
@@ -272,26 +643,71 @@ def main() -> None:
         # If the command is "apply", delete the stack and return the list of
         # existing resources as the list of deleted resources
         elif inputs.command == "apply":
+            # The stack ID identifies this stack's events on a notification
+            # queue shared with deployments to other accounts or regions
+            stack_description = describe_stack()
+            stack_id = (
+                None if stack_description is None else stack_description["StackId"]
+            )
             # Delete the stack
             print("Deleting the stack")
             client.delete_stack(StackName=stack_name)
-            # Wait for the stack deletion to complete
-            while True:
-                time.sleep(3)
-                exists = check_stack_exists()
-                if not exists:
-                    break
-                status = get_stack_status()
-                if status.endswith("COMPLETE"):
+            # Wait for the stack events via SQS when a notification queue is
+            # configured; fall back to polling otherwise, on timeout, or if
+            # the stack has not settled yet when the event is processed
+            completed = False
+            queue_url = inputs.module_config.get("NotificationQueueUrl")
+            if (
+                queue_url is not None
+                and stack_id is not None
+                and wait_for_stack_events(queue_url, stack_id) is not None
+            ):
+                if not check_stack_exists(force_refresh=True):
                     print("The deletion of the stack has completed")
-                    break
-                # Wait if the status is still pending or in progress
-                if status.endswith("IN_PROGRESS"):
-                    print("Waiting for the stack deletion to complete")
-                    continue
-                # If the status is unknown, raise an error
-                print(f"The deletion of the stack failed: {status}")
-                raise RuntimeError("Failed to delete the stack")
+                    completed = True
+                else:
+                    status = get_stack_status()
+                    if status in _STACK_DELETE_SUCCESS:
+                        print("The deletion of the stack has completed")
+                        completed = True
+                    elif status not in _STACK_IN_PROGRESS:
+                        print(f"The deletion of the stack failed: {status}")
+                        raise RuntimeError("Failed to delete the stack")
+            if not completed:
+                # Wait for the stack deletion to complete
+                delay = _MIN_POLL_SECONDS
+                last_status = None
+                while True:
+                    _sleep_with_jitter(delay)
+                    try:
+                        exists = check_stack_exists(force_refresh=True)
+                    except botocore.exceptions.ClientError as err:
+                        if _is_throttling_error(err):
+                            delay = _next_poll_delay(delay)
+                            continue
+                        raise
+                    if not exists:
+                        break
+                    status = get_stack_status()
+                    delay = (
+                        _MIN_POLL_SECONDS
+                        if status != last_status
+                        else _next_poll_delay(delay)
+                    )
+                    last_status = status
+                    if status in _STACK_DELETE_SUCCESS:
+                        print("The deletion of the stack has completed")
+                        break
+                    # Wait if the status is still pending or in progress
+                    if status in _STACK_IN_PROGRESS:
+                        print("Waiting for the stack deletion to complete")
+                        continue
+                    # If the status is unknown, raise an error
+                    print(f"The deletion of the stack failed: {status}")
+                    raise RuntimeError("Failed to delete the stack")
+            # Forget the stored deployment hash, so that a later re-creation
+            # of the stack does not get skipped
+            clear_deployment_hash()
             # Return the list of resources that existed before the stack
             # was deleted
             base.write_wrapper_outputs(
@@ -302,4 +718,7 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    if "--worker" in sys.argv:
+        base.worker_loop(main)
+    else:
+        main()
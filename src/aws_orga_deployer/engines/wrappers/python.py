@@ -1,21 +1,78 @@
 """Wrapper of Python modules that is executed in a subprocess."""
 
+import hashlib
+import importlib.machinery
 import importlib.util
+import os
+import py_compile
 import sys
+from types import ModuleType
+from typing import List, Optional
 
 from aws_orga_deployer.engines.wrappers import base
 
 
-def main():
-    """Main function."""
-    # Read the inputs from the JSON file `input.json`
-    inputs = base.read_wrapper_inputs()
-    # Import the module Python script
-    module_file = sys.argv[1]
-    spec = importlib.util.spec_from_file_location("main", module_file)
+def _load_module(module_file: str, engine_cache_dir: str) -> ModuleType:
+    """Import the module main script, reusing bytecode cached in the engine
+    cache directory and keyed by the source content hash, so that repeated
+    wrapper invocations skip the parse and compile phase. Falls back to
+    importing the source directly if the cache cannot be used.
+
+    Args:
+        module_file: Path to the module main script.
+        engine_cache_dir: Path to the engine cache directory.
+
+    Returns:
+        The imported module.
+    """
+    spec: Optional[importlib.machinery.ModuleSpec] = None
+    try:
+        with open(module_file, "rb") as stream:
+            source = stream.read()
+        digest = hashlib.blake2b(source, digest_size=8).hexdigest()
+        # The interpreter cache tag keys the file by bytecode format, so that
+        # a pyc compiled by another Python version is never loaded
+        cache_tag = sys.implementation.cache_tag or "unknown"
+        cfile = os.path.join(engine_cache_dir, f"main_{digest}.{cache_tag}.pyc")
+        if not os.path.exists(cfile):
+            os.makedirs(engine_cache_dir, exist_ok=True)
+            py_compile.compile(module_file, cfile=cfile, doraise=True)
+        loader = importlib.machinery.SourcelessFileLoader("main", cfile)
+        # Validate the cached bytecode before executing anything, so that a
+        # stale or truncated file falls back to the source instead of failing
+        # the step
+        loader.get_code("main")
+        spec = importlib.util.spec_from_file_location("main", cfile, loader=loader)
+    except (OSError, py_compile.PyCompileError):
+        spec = None
+    except (ImportError, EOFError, ValueError):
+        # The cached file cannot be loaded by this interpreter; remove it so
+        # that it is recompiled at the next invocation
+        try:
+            os.remove(cfile)
+        except OSError:
+            pass
+        spec = None
+    if spec is None:
+        spec = importlib.util.spec_from_file_location("main", module_file)
+    assert spec is not None and spec.loader is not None
     main_module = importlib.util.module_from_spec(spec)
     sys.modules["main"] = main_module
     spec.loader.exec_module(main_module)
+    return main_module
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main function.
+
+    Args:
+        argv: Wrapper arguments. Default to `sys.argv[1:]`.
+    """
+    # Read the inputs from the JSON file `input.json`
+    inputs = base.read_wrapper_inputs()
+    # Import the module Python script
+    module_file = argv[0] if argv else sys.argv[1]
+    main_module = _load_module(module_file, inputs.engine_cache_dir)
     # Execute the main function of the module
     made_changes, result, detailed_results, outputs = main_module.main(
         inputs.module,
@@ -34,4 +91,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    if "--worker" in sys.argv:
+        base.worker_loop(main)
+    else:
+        main()
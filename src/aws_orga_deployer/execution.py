@@ -1,28 +1,89 @@
 """Execute the steps of a deployment package."""
 
+import glob
+import json
 import logging
 import os
+import queue
 import shutil
 import signal
 import subprocess
 import time
 from datetime import datetime
-from threading import Event, Lock, Thread
-from typing import Any, Dict
+from threading import Condition, Event, Lock, Semaphore, Thread
+from typing import Any, Dict, Optional, Tuple
 
 from aws_orga_deployer import config, utils
 from aws_orga_deployer.engines import ENGINES
+from aws_orga_deployer.engines.base import StepCommand
 from aws_orga_deployer.package import Package, graph
 from aws_orga_deployer.package.store import ModuleAccountRegionKey
 
 LOGGER = logging.getLogger(__name__)
 LOGGER.addHandler(logging.NullHandler())
 
+# True if deletions can be delegated to `rm -rf`, which is considerably
+# faster than shutil.rmtree on large folders
+_HAS_RM = os.name == "posix" and shutil.which("rm") is not None
+
 
 class SubprocessError(Exception):
     """Exception to raise if an error occurs when running subprocesses."""
 
 
+def _fast_rmtree(target: str) -> None:
+    """Delete a folder, delegating to `rm -rf` when available as it removes
+    files with far fewer syscalls than shutil.rmtree. Errors are ignored, as
+    for shutil.rmtree(ignore_errors=True).
+
+    Args:
+        target: Path of the folder to delete.
+    """
+    if _HAS_RM:
+        subprocess.run(
+            ["rm", "-rf", "--", target],
+            check=False,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    else:
+        shutil.rmtree(target, ignore_errors=True)
+
+
+def _rmtree_in_background(target: str) -> None:
+    """Delete a folder from a daemon thread, so that the caller does not block
+    on a deletion that may span a large number of files.
+
+    Args:
+        target: Path of the folder to delete.
+    """
+    Thread(
+        target=_fast_rmtree,
+        args=(target,),
+        daemon=True,
+        name="Rmtree",
+    ).start()
+
+
+def _discard_folder(target: str) -> None:
+    """Discard a folder without blocking: rename it to a unique sibling,
+    which is a single metadata operation, and delete the renamed folder in
+    the background. Any leftover renamed folder from an interrupted run is
+    swept at the next startup.
+
+    Args:
+        target: Path of the folder to discard.
+    """
+    trash_path = f"{target}.trash.{os.getpid()}.{time.time_ns()}"
+    try:
+        os.rename(target, trash_path)
+    except OSError:
+        # Fall back to a synchronous deletion in place
+        shutil.rmtree(target, ignore_errors=True)
+        return
+    _rmtree_in_background(trash_path)
+
+
 class Executor:
     """Class that is used to execute the steps of a deployment package using
     the modules.
@@ -32,17 +93,34 @@ class Executor:
         nb_times_sigint: Number of times CTRL+C was pressed.
         stop_workers: Event object used to inform worker threads that they must
             stop after completing the current step.
-        send_sigint: Event object used to inform worker threads that they must
-            send a SIGINT signal to their subprocesses to quit gracefully.
-        send_sigint: Event object used to inform worker threads that they must
-            send a SIGTERM signal to their subprocesses to force quit.
-        aws_temp_credentials: Store AWS temporary credentials retrieved for each
-            IAM role and when they were obtained. Avoid to do an AssumeRole for
+        child_processes: Subprocesses currently running, keyed by PID. The
+            signal drainer thread forwards SIGINT or SIGTERM signals to
+            their process groups directly, so that workers can block on the
+            subprocess exit instead of polling for signals to forward.
+        lock_child_processes: Lock object guarding `child_processes`.
+        aws_temp_credentials: Store AWS temporary credentials retrieved for
+            each IAM role as immutable (created_monotonic, credentials)
+            tuples, so cache hits are plain dict reads that need no lock.
+            Avoid to do an AssumeRole for every step.
+        role_locks: One lock per IAM role, so that workers assuming different
+            roles do not serialize, while workers needing the same role only
+            trigger one AssumeRole call.
+        lock_role_locks: Lock object guarding the creation of role locks.
+        base_env: Snapshot of the process environment taken at startup, merged
+            into each subprocess environment instead of copying os.environ on
             every step.
-        lock_aws_temp_credentials: Lock object to avoid multiple threads to
-            retrieve AWS temporary credentials at the same time.
-        lock_next: Lock object to avoid multiple threads to retrieve the next
-            step at the same time.
+        ready_queue: Queue of ready steps fed by the scheduler thread to the
+            worker threads. A None item tells a worker to stop.
+        steps_semaphore: Semaphore that bounds the number of steps queued or
+            being processed to the number of workers. Acquired by the
+            scheduler before taking a step from the graph, released by
+            workers when they finish a step.
+        progress_condition: Condition notified whenever a step completes or
+            fails, so that the scheduler re-evaluates the graph immediately
+            instead of sleeping while steps wait for their dependencies.
+        delete_queue: Queue of renamed deployment cache folders deleted by
+            the janitor thread, so that workers do not block on recursive
+            deletions between steps.
         engines_cache_dir: Path to the folder that contains engines cache
         deployments_cache_dir: Path to the folder that contains deployments cache
         root_logs_dir: Root path to the logs of this run
@@ -50,12 +128,19 @@ class Executor:
 
     package: Package
     nb_times_sigint: int
+    _sig_read_fd: int
+    _sig_write_fd: int
     stop_workers: Event
-    send_sigint: Event
-    send_sigterm: Event
-    aws_temp_credentials: Dict[str, Any]
-    lock_aws_temp_credentials: Lock
-    lock_next: Lock
+    child_processes: Dict[int, subprocess.Popen]
+    lock_child_processes: Lock
+    aws_temp_credentials: Dict[str, Tuple[float, Dict[str, str]]]
+    role_locks: Dict[str, Lock]
+    lock_role_locks: Lock
+    base_env: Dict[str, str]
+    ready_queue: queue.SimpleQueue
+    delete_queue: queue.SimpleQueue
+    steps_semaphore: Semaphore
+    progress_condition: Condition
     engines_cache_dir: Dict[str, str]
     deployments_cache_dir: str
     root_logs_dir: str
@@ -64,11 +149,15 @@ class Executor:
         self.package = package
         self.nb_times_sigint = 0
         self.stop_workers = Event()
-        self.send_sigint = Event()
-        self.send_sigterm = Event()
+        self.child_processes = {}
+        self.lock_child_processes = Lock()
         self.aws_temp_credentials = {}
-        self.lock_aws_temp_credentials = Lock()
-        self.lock_next = Lock()
+        self.role_locks = {}
+        self.lock_role_locks = Lock()
+        self.base_env = dict(os.environ)
+        self.ready_queue = queue.SimpleQueue()
+        self.delete_queue = queue.SimpleQueue()
+        self.progress_condition = Condition()
         self._create_temp_folders()
 
     def _create_temp_folders(self) -> None:
@@ -83,30 +172,79 @@ class Executor:
             self.engines_cache_dir[engine] = engine_dir
             if not os.path.isdir(engine_dir):
                 os.makedirs(engine_dir)
-        # Delete deployment cache folders if exist (cache/deployments)
+        # Discard deployment cache folders left by a previous run, including
+        # renamed folders whose deletion was interrupted (cache/deployments)
         self.deployments_cache_dir = os.path.join(cache_dir, "deployments")
+        for stale_trash in glob.glob(f"{self.deployments_cache_dir}.trash.*"):
+            _rmtree_in_background(stale_trash)
         if os.path.exists(self.deployments_cache_dir):
-            shutil.rmtree(self.deployments_cache_dir)
+            _discard_folder(self.deployments_cache_dir)
         # Evaluate if deployment cache must persist after this run
         self.delete_deployment_cache = (
             config.CLI.get("keep_deployment_cache", False) is False
         )
-        # Create the logs folder (outputs/YYYYMMDD-HHMMSS)
+        # Create the logs folder (outputs/YYYYMMDD-HHMMSS) and the
+        # subfolders for every deployment known to the package, so that the
+        # workers never have to probe or create log folders while they run
         current_date = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
         self.root_logs_dir = os.path.join(config.CLI["temp_dir"], "logs", current_date)
         if not os.path.isdir(self.root_logs_dir):
             os.makedirs(self.root_logs_dir)
+        for key in self.package.target.keys() | self.package.current.keys():
+            os.makedirs(
+                os.path.join(
+                    self.root_logs_dir, key.module, key.account_id, key.region
+                ),
+                exist_ok=True,
+            )
 
     def run(self) -> None:
         """Function to call to launch the execution of steps."""
+        # The "update-hash" command only mutates the in-memory state, so it
+        # is processed in this thread without the scheduler, the workers and
+        # the signal machinery
+        if config.CLI["command"] == "update-hash":
+            self._update_hashes()
+            self.package.save()
+            return
         # Catch SIGINT signals to be able to stop gracefully the processing of
-        # steps
+        # steps. The signal handler only writes the signal number to a pipe
+        # (via `signal.set_wakeup_fd`) that a dedicated drainer thread reads,
+        # so that the work of stopping the workers and signaling subprocesses
+        # is not done in the signal handler, which the interpreter only runs
+        # at bytecode boundaries of the main thread
+        self._sig_read_fd, self._sig_write_fd = os.pipe()
+        os.set_blocking(self._sig_write_fd, False)
+        old_wakeup_fd = signal.set_wakeup_fd(self._sig_write_fd)
         signal.signal(signal.SIGINT, self._catch_sigint)
+        drainer_thread = Thread(
+            target=self._signal_drainer,
+            daemon=True,
+            name="SignalDrainer",
+        )
+        drainer_thread.start()
         # Launch concurrent threads to execute the steps
         nb_threads = config.PACKAGE.get(
             "ConcurrentWorkers", config.DEFAULT_CONCURRENT_WORKERS
         )
+        self.steps_semaphore = Semaphore(nb_threads)
         threads = []
+        # Launch the scheduler thread that feeds ready steps to the workers
+        scheduler_thread = Thread(
+            target=self._scheduler,
+            args=(nb_threads,),
+            daemon=True,
+            name="Scheduler",
+        )
+        scheduler_thread.start()
+        threads.append(scheduler_thread)
+        # Launch the janitor thread that deletes discarded cache folders
+        janitor_thread = Thread(
+            target=self._janitor,
+            daemon=True,
+            name="Janitor",
+        )
+        janitor_thread.start()
         for worker_id in range(nb_threads):
             thread = Thread(
                 target=self.worker,
@@ -120,311 +258,659 @@ class Executor:
             thread.join()
         # Save the current state store before exiting
         self.package.save()
+        # Stop the janitor thread. Folders that it did not delete yet are
+        # inside the deployments cache root folder discarded below
+        self.delete_queue.put(None)
+        janitor_thread.join(timeout=5)
         # Delete the deployments cache root folder if needed
         if self.delete_deployment_cache:
-            shutil.rmtree(self.deployments_cache_dir, ignore_errors=True)
-        # Stop catching SIGINT signals
+            _discard_folder(self.deployments_cache_dir)
+        # Stop catching SIGINT signals and stop the drainer thread by closing
+        # its pipe
         signal.signal(signal.SIGINT, Executor._stop_catching_sigint)
+        signal.set_wakeup_fd(old_wakeup_fd)
+        os.close(self._sig_write_fd)
+        drainer_thread.join(timeout=5)
+        os.close(self._sig_read_fd)
+
+    def _update_hashes(self) -> None:
+        """Update the module hash of every pending deployment. Each step
+        completes synchronously, so the graph is drained in a simple loop
+        instead of going through the scheduler and the worker threads."""
+        while True:
+            try:
+                key, _, _, _ = self.package.next()
+            except graph.NoMorePendingStep:
+                break
+            except graph.NoProcessableStep:
+                # Cannot happen as every step taken from the graph was
+                # completed before requesting the next one
+                break
+            hash_changed = self.package.update_hash(key)
+            if hash_changed:
+                LOGGER.info("%s Updated the value of the module hash", key)
+            else:
+                LOGGER.info("%s No action needed", key)
 
     def worker(self) -> None:
         """Main function executed by concurrent workers."""
 
         LOGGER.debug("Starting worker")
-        while True:
-            # Stop the worker is `stop_workers` is set
+        # Persistent wrapper processes reused by this worker thread across
+        # steps, keyed by (Python executable, wrapper script)
+        persistent_workers: Dict[Tuple[str, str], subprocess.Popen] = {}
+        try:
+            self._worker_loop(persistent_workers)
+        finally:
+            self._stop_persistent_workers(persistent_workers)
+
+    def _scheduler(self, nb_workers: int) -> None:
+        """Single producer that feeds ready steps to the worker threads. Only
+        this thread calls `package.next()`, so the package graph is never
+        read and updated concurrently and workers do not contend on a lock.
+
+        Args:
+            nb_workers: Number of worker threads to wake up when there is no
+                more work.
+        """
+        # pylint: disable=bare-except
+        while not self.stop_workers.is_set():
+            # The semaphore bounds the number of steps queued or in progress,
+            # so that steps are not taken from the graph long before a worker
+            # is available to process them. The slot is released by the worker
+            # that completes the step, so a with-block would be incorrect here
+            # pylint: disable-next=consider-using-with
+            self.steps_semaphore.acquire()
             if self.stop_workers.is_set():
+                self.steps_semaphore.release()
                 break
-            # Get the next deployment to process. Use a lock to avoid
-            # multiple workers to update the package graph at the same time
-            # pylint: disable=bare-except
-            # pylint: disable=broad-exception-caught
             try:
-                with self.lock_next:
-                    key, action, nb_attempts, max_attempts = self.package.next()
-                    LOGGER.info(
-                        "%s Starting to %s (Attempt %s/%s)",
-                        key,
-                        action,
-                        nb_attempts,
-                        max_attempts,
-                    )
-            # Wait one second if there are still pending deployments but they
-            # are all waiting for dependencies to complete
+                item = self.package.next()
+            # If there are still pending deployments but they are all
+            # waiting for dependencies to complete, wait until a step
+            # completes or fails. The timeout is a safety net in case a
+            # notification is missed
             except graph.NoProcessableStep:
-                time.sleep(1)
+                self.steps_semaphore.release()
+                with self.progress_condition:
+                    self.progress_condition.wait(timeout=1.0)
                 continue
-            # Stop the worker if there are no more pending deployments
+            # Stop if there are no more pending deployments
             except graph.NoMorePendingStep:
+                self.steps_semaphore.release()
                 break
-            # Stop the worker if `next` failed
+            # Stop if `next` failed
             except:
+                self.steps_semaphore.release()
                 LOGGER.error(
-                    "Worker failed to get the next deployment to process",
+                    "Failed to get the next deployment to process",
                     exc_info=config.CLI["debug"],
                 )
                 break
-            # If the requested command is "update-hash", attempt to update the
-            # module hash and move to the next deployment to process
-            if config.CLI["command"] == "update-hash":
-                hash_changed = self.package.update_hash(key)
-                if hash_changed:
-                    LOGGER.info("%s Updated the value of the module hash", key)
-                else:
-                    LOGGER.info("%s No action needed", key)
-                continue
-            # Use this variable to indicate where the step fails in the
-            # detailed error logs
-            section_that_failed = "other"
-            # Determine the name of the deployment cache
-            deployment_cache_dir = os.path.join(
-                self.deployments_cache_dir, key.module, key.account_id, key.region
+            self.ready_queue.put(item)
+        # Wake up all the workers so that they stop
+        for _ in range(nb_workers):
+            self.ready_queue.put(None)
+
+    def _worker_loop(
+        self, persistent_workers: Dict[Tuple[str, str], subprocess.Popen]
+    ) -> None:
+        """Process the ready steps fed by the scheduler until it sends the
+        stop sentinel.
+
+        Args:
+            persistent_workers: Persistent wrapper processes owned by this
+                worker thread.
+        """
+        while True:
+            item = self.ready_queue.get()
+            if item is None:
+                break
+            key, action, nb_attempts, max_attempts = item
+            LOGGER.info(
+                "%s Starting to %s (Attempt %s/%s)",
+                key,
+                action,
+                nb_attempts,
+                max_attempts,
             )
-            # Catch any exceptions to prevent the worker thread from being
-            # interrupted if the module fails
             try:
-                # Measure the step execution time
-                start_time = datetime.now()
-                # Create the deployment cache dir
-                os.makedirs(deployment_cache_dir)
-                # If the action is "create" or "update", the variables that are
-                # passed are those expected in the target date. If the action is
-                # "delete", the variables that are passed are those in the
-                # current state.
-                if action in ("create", "update"):
-                    variables = self.package.target[key].variables
-                else:
-                    variables = self.package.current[key].variables
-                # Call `prepare` to prepare input files to subprocesses, and
-                # retrieve a list of commands to execute in subprocesses
+                self._process_step(persistent_workers, key, action, nb_attempts)
+            finally:
+                # Allow the scheduler to feed another step
+                self.steps_semaphore.release()
+
+    def _process_step(
+        self,
+        persistent_workers: Dict[Tuple[str, str], subprocess.Popen],
+        key: ModuleAccountRegionKey,
+        action: str,
+        nb_attempts: int,
+    ) -> None:
+        """Execute one step of the deployment package.
+
+        Args:
+            persistent_workers: Persistent wrapper processes owned by this
+                worker thread.
+            key: Step key to execute.
+            action: Action to be made ("create", "update" or "destroy").
+            nb_attempts: Current attempt number.
+        """
+        # pylint: disable=bare-except
+        # pylint: disable=broad-exception-caught
+        # Use this variable to indicate where the step fails in the
+        # detailed error logs
+        section_that_failed = "other"
+        # Resolve the per-step invariants once instead of once per command
+        module = config.MODULES[key.module]
+        deployment_cache_dir = os.path.join(
+            self.deployments_cache_dir, key.module, key.account_id, key.region
+        )
+        log_path = os.path.join(
+            self.root_logs_dir, key.module, key.account_id, key.region
+        )
+        # Catch any exceptions to prevent the worker thread from being
+        # interrupted if the module fails
+        try:
+            # Measure the step execution time with a monotonic clock
+            start_ns = time.perf_counter_ns()
+            # Create the deployment cache dir
+            os.makedirs(deployment_cache_dir)
+            # If the action is "create" or "update", the variables that are
+            # passed are those expected in the target date. If the action is
+            # "delete", the variables that are passed are those in the
+            # current state.
+            if action in ("create", "update"):
+                variables = self.package.target[key].variables
+            else:
+                variables = self.package.current[key].variables
+            # Call `prepare` to prepare input files to subprocesses, and
+            # retrieve a list of commands to execute in subprocesses
+            try:
+                module_config = self.package.get_module_config(key)
+                LOGGER.debug("%s Executing prepare", key)
+                commands = module.prepare(
+                    key=key,
+                    command=config.CLI["command"],
+                    action=action,
+                    variables=variables,
+                    module_config=module_config,
+                    deployment_cache_dir=deployment_cache_dir,
+                    engine_cache_dir=self.engines_cache_dir[module.engine],
+                )
+            except:
+                section_that_failed = "prepare"
+                raise
+            # Execute subprocesses
+            for command in commands:
+                env = {**self.base_env, **command.env}
+                # Assume an IAM role if needed and add AWS temporary
+                # credentials to the environment variables
+                iam_role = module_config.get("AssumeRole")
+                if command.assume_role and not iam_role is None:
+                    credentials = self._get_aws_temp_credentials(iam_role)
+                    env["AWS_ACCESS_KEY_ID"] = credentials["AccessKeyId"]
+                    env["AWS_SECRET_ACCESS_KEY"] = credentials["SecretAccessKey"]
+                    env["AWS_SESSION_TOKEN"] = credentials["SessionToken"]
+                # Execute the subprocess
+                LOGGER.debug("%s Executing subprocess '%s'", key, command.name)
+                LOGGER.debug("%s Command: %s", key, " ".join(command.args))
+                LOGGER.debug("%s Cwd: %s", key, command.cwd)
+                section_subprocess = f"subprocess '{command.name}'"
+                # Route wrapper commands to a persistent worker process if
+                # possible, to amortize the interpreter startup and boto3
+                # import costs across steps
+                if command.persistent:
+                    try:
+                        handled = self._run_in_persistent_worker(
+                            persistent_workers, log_path, command, env, nb_attempts
+                        )
+                    except:
+                        section_that_failed = section_subprocess
+                        raise
+                    if handled:
+                        continue
                 try:
-                    module_config = self.package.get_module_config(key)
-                    LOGGER.debug("%s Executing prepare", key)
-                    commands = config.MODULES[key.module].prepare(
-                        key=key,
-                        command=config.CLI["command"],
-                        action=action,
-                        variables=variables,
-                        module_config=module_config,
-                        deployment_cache_dir=deployment_cache_dir,
-                        engine_cache_dir=self.engines_cache_dir[
-                            config.MODULES[key.module].engine
-                        ],
+                    # pylint: disable=subprocess-popen-preexec-fn
+                    # pylint: disable=consider-using-with
+                    # Stream the subprocess output directly to the log files,
+                    # or to the requested stdout file, so that it is never
+                    # buffered in memory
+                    if command.stdout_file is None:
+                        stdout_stream = self._open_subprocess_log(
+                            log_path, command.name, nb_attempts, "stdout.log"
+                        )
+                    else:
+                        stdout_stream = open(command.stdout_file, "wb")
+                        self._write_subprocess_logs(
+                            log_path,
+                            command.name,
+                            nb_attempts,
+                            "stdout.log",
+                            b"(stdout redirected to a file)",
+                        )
+                    stderr_stream = self._open_subprocess_log(
+                        log_path, command.name, nb_attempts, "stderr.log"
                     )
-                except:
-                    section_that_failed = "prepare"
-                    raise
-                # Execute subprocesses
-                for command in commands:
-                    env = os.environ.copy()
-                    env.update(command.env)
-                    # Assume an IAM role if needed and add AWS temporary
-                    # credentials to the environment variables
-                    iam_role = module_config.get("AssumeRole")
-                    if command.assume_role and not iam_role is None:
-                        self._add_aws_temp_credentials(env, iam_role)
-                    # Execute the subprocess
-                    LOGGER.debug("%s Executing subprocess '%s'", key, command.name)
-                    LOGGER.debug("%s Command: %s", key, " ".join(command.args))
-                    LOGGER.debug("%s Cwd: %s", key, command.cwd)
                     try:
-                        # pylint: disable=subprocess-popen-preexec-fn
-                        # pylint: disable=consider-using-with
-                        # Need to catch SIGINT signals to exit gracefully
                         process = subprocess.Popen(
                             command.args,
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE,
-                            stdin=subprocess.PIPE,
+                            stdout=stdout_stream,
+                            stderr=stderr_stream,
+                            stdin=subprocess.DEVNULL,
                             env=env,
                             cwd=command.cwd,
                             shell=False,
                             start_new_session=True,
                         )
-                        sent_sigint = False
-                        sent_sigterm = False
-                        while True:
-                            # Check every second if a signal SIGINT or SIGTERM must
-                            # be sent to be the subprocess. Wait for the subprocess
-                            # to exit after sending the signal
-                            try:
-                                stdout, stderr = process.communicate(timeout=0.1)
-                                # Write the subprocess logs
-                                self._write_subprocess_logs(
-                                    key,
-                                    command.name,
-                                    nb_attempts,
-                                    "stdout.log",
-                                    stdout.decode(),
-                                )
-                                self._write_subprocess_logs(
-                                    key,
-                                    command.name,
-                                    nb_attempts,
-                                    "stderr.log",
-                                    stderr.decode(),
-                                )
-                                # Write stdout to a file if needed:
-                                if not command.stdout_file is None:
-                                    with open(command.stdout_file, "wb") as stream:
-                                        stream.write(stdout)
-                                # The subprocess must return an exit code of 0
-                                if process.returncode != 0:
-                                    section_that_failed = f"subprocess '{command.name}'"
-                                    raise SubprocessError("Exit code is not 0")
-                                # Interrupt the step if SIGINT or SIGTERM was
-                                # pressed
-                                if sent_sigint or sent_sigterm:
-                                    section_that_failed = f"subprocess '{command.name}'"
-                                    raise SubprocessError("Subprocess interrupted")
-                                # Exit the loop if the subprocess has completed
-                                break
-                            except subprocess.TimeoutExpired:
-                                if self.send_sigint.is_set() and not sent_sigint:
-                                    process.send_signal(signal.SIGINT)
-                                    sent_sigint = True
-                                if self.send_sigterm.is_set() and not sent_sigterm:
-                                    process.send_signal(signal.SIGTERM)
-                                    sent_sigterm = True
-                    except:
-                        section_that_failed = f"subprocess '{command.name}'"
-                        raise
-                # Execute the post-process function to parse outputs from the
-                # subprocesses
-                try:
-                    LOGGER.debug("%s Executing postprocess", key)
-                    outcome = config.MODULES[key.module].postprocess(
-                        key=key,
-                        command=config.CLI["command"],
-                        action=action,
-                        module_config=module_config,
-                        deployment_cache_dir=deployment_cache_dir,
-                    )
+                        # Register the subprocess so that the SIGINT handler
+                        # can forward signals to it, and block until it exits
+                        self._register_child(process)
+                        try:
+                            process.wait()
+                        finally:
+                            self._unregister_child(process)
+                    finally:
+                        if command.stdout_file is None:
+                            stdout_stream.write(b"\n")
+                        stdout_stream.close()
+                        stderr_stream.write(b"\n")
+                        stderr_stream.close()
+                    # Interrupt the step if SIGINT or SIGTERM was pressed
+                    if self.nb_times_sigint >= 2:
+                        section_that_failed = section_subprocess
+                        raise SubprocessError("Subprocess interrupted")
+                    # The subprocess must return an exit code of 0
+                    if process.returncode != 0:
+                        section_that_failed = section_subprocess
+                        raise SubprocessError("Exit code is not 0")
                 except:
-                    section_that_failed = "postprocess"
+                    section_that_failed = section_subprocess
                     raise
-                # Complete the step if no exception was raised
-                self.package.complete(
-                    key,
-                    made_changes=outcome.made_changes,
-                    result=outcome.result,
-                    detailed_results=outcome.detailed_results,
-                    outputs=outcome.outputs,
-                )
-                LOGGER.info("%s Completed - %s", key, outcome.result)
-                # Display the step execution time
-                stop_time = datetime.now()
-                elapsed_ms = (stop_time - start_time).total_seconds()
-                LOGGER.debug("%s Execution time: %.3f seconds", key, elapsed_ms)
-            # Catch any exceptions and mark the step as failed
-            except Exception as err:
-                LOGGER.error(
-                    "%s Failed. See logs for details", key, exc_info=config.CLI["debug"]
+            # Execute the post-process function to parse outputs from the
+            # subprocesses
+            try:
+                LOGGER.debug("%s Executing postprocess", key)
+                outcome = module.postprocess(
+                    key=key,
+                    command=config.CLI["command"],
+                    action=action,
+                    module_config=module_config,
+                    deployment_cache_dir=deployment_cache_dir,
                 )
-                self.package.fail(
-                    key,
-                    result="Failed",
-                    detailed_results={
-                        "FailedSection": section_that_failed,
-                        "ErrorMessage": str(err),
-                    },
+            except:
+                section_that_failed = "postprocess"
+                raise
+            # Complete the step if no exception was raised
+            self.package.complete(
+                key,
+                made_changes=outcome.made_changes,
+                result=outcome.result,
+                detailed_results=outcome.detailed_results,
+                outputs=outcome.outputs,
+            )
+            # Wake the scheduler up, as dependent steps may now be ready
+            with self.progress_condition:
+                self.progress_condition.notify_all()
+            LOGGER.info("%s Completed - %s", key, outcome.result)
+            # Display the step execution time
+            elapsed_seconds = (time.perf_counter_ns() - start_ns) / 1e9
+            LOGGER.debug("%s Execution time: %.3f seconds", key, elapsed_seconds)
+        # Catch any exceptions and mark the step as failed
+        except Exception as err:
+            LOGGER.error(
+                "%s Failed. See logs for details", key, exc_info=config.CLI["debug"]
+            )
+            self.package.fail(
+                key,
+                result="Failed",
+                detailed_results={
+                    "FailedSection": section_that_failed,
+                    "ErrorMessage": str(err),
+                },
+            )
+            # Wake the scheduler up, as the graph state changed
+            with self.progress_condition:
+                self.progress_condition.notify_all()
+        # Delete the deployment cache for this deployment if needed. Most
+        # steps of read-only commands leave the folder empty, in which case a
+        # single rmdir call replaces a recursive deletion
+        finally:
+            if self.delete_deployment_cache:
+                try:
+                    os.rmdir(deployment_cache_dir)
+                except OSError:
+                    self._queue_folder_deletion(deployment_cache_dir)
+
+    def _janitor(self) -> None:
+        """Delete the discarded cache folders queued by the workers, until
+        the stop sentinel is received."""
+        while True:
+            target = self.delete_queue.get()
+            if target is None:
+                break
+            _fast_rmtree(target)
+
+    def _queue_folder_deletion(self, target: str) -> None:
+        """Discard a folder without blocking the calling worker: rename it to
+        a unique sibling, which is a single metadata operation, and hand the
+        renamed folder to the janitor thread for deletion.
+
+        Args:
+            target: Path of the folder to discard.
+        """
+        trash_path = f"{target}.trash.{os.getpid()}.{time.time_ns()}"
+        try:
+            os.rename(target, trash_path)
+        except OSError:
+            # Fall back to a synchronous deletion in place
+            _fast_rmtree(target)
+            return
+        self.delete_queue.put(trash_path)
+
+    def _run_in_persistent_worker(
+        self,
+        persistent_workers: Dict[Tuple[str, str], subprocess.Popen],
+        log_path: str,
+        command: StepCommand,
+        env: Dict[str, str],
+        nb_attempts: int,
+    ) -> bool:
+        """Run a wrapper command in a persistent worker process, spawning it
+        on first use and reusing it for subsequent steps executed by this
+        worker thread. The job is sent as a JSON line on the worker stdin and
+        the result is read as a JSON line on its stdout.
+
+        Args:
+            persistent_workers: Persistent wrapper processes owned by this
+                worker thread.
+            log_path: Path of the folder that stores the logs of this step.
+            command: Command to execute.
+            env: Environment variables of the command.
+            nb_attempts: Current attempt number.
+
+        Returns:
+            True if the command was executed by a persistent worker, or False
+            if the worker could not be spawned and the caller must fall back
+            to a one-shot subprocess.
+
+        Raises:
+            SubprocessError: If the job failed or was interrupted.
+        """
+        worker_key = (command.args[0], command.args[1])
+        process = persistent_workers.get(worker_key)
+        if process is None or process.poll() is not None:
+            try:
+                # pylint: disable=consider-using-with
+                process = subprocess.Popen(
+                    [command.args[0], command.args[1], "--worker"],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    stdin=subprocess.PIPE,
+                    shell=False,
+                    start_new_session=True,
                 )
-            # Delete the deployment cache for this deployment if needed
-            finally:
-                if self.delete_deployment_cache:
-                    shutil.rmtree(deployment_cache_dir, ignore_errors=True)
+            except OSError:
+                persistent_workers.pop(worker_key, None)
+                return False
+            persistent_workers[worker_key] = process
+            # Register the worker so that the SIGINT handler can forward
+            # signals to it; it stays registered until it is stopped
+            self._register_child(process)
+        # Send the job and block until the result line arrives or the worker
+        # dies, typically after receiving a forwarded signal
+        job = {"cwd": command.cwd, "env": env, "args": list(command.args[2:])}
+        # The worker is always spawned with stdin and stdout pipes
+        assert process.stdin is not None and process.stdout is not None
+        process.stdin.write(json.dumps(job).encode() + b"\n")
+        process.stdin.flush()
+        line = process.stdout.readline()
+        if not line:
+            # The worker died while processing the job, either because it was
+            # interrupted or because it crashed
+            persistent_workers.pop(worker_key, None)
+            process.wait()
+            self._unregister_child(process)
+            if self.nb_times_sigint >= 2:
+                raise SubprocessError("Subprocess interrupted")
+            raise SubprocessError("Worker process exited unexpectedly")
+        # A worker that received a signal may be in an inconsistent state and
+        # must not be reused
+        if self.nb_times_sigint >= 2:
+            persistent_workers.pop(worker_key, None)
+            process.kill()
+            self._unregister_child(process)
+            raise SubprocessError("Subprocess interrupted")
+        result = json.loads(line)
+        # Write the job logs captured by the worker
+        self._write_subprocess_logs(
+            log_path,
+            command.name,
+            nb_attempts,
+            "stdout.log",
+            result["stdout"].encode(),
+        )
+        self._write_subprocess_logs(
+            log_path,
+            command.name,
+            nb_attempts,
+            "stderr.log",
+            result["stderr"].encode(),
+        )
+        if not command.stdout_file is None:
+            with open(command.stdout_file, "w", encoding="utf-8") as stream:
+                stream.write(result["stdout"])
+        if not result["ok"]:
+            raise SubprocessError("Exit code is not 0")
+        return True
+
+    def _stop_persistent_workers(
+        self, persistent_workers: Dict[Tuple[str, str], subprocess.Popen]
+    ) -> None:
+        """Ask the persistent worker processes of a worker thread to exit by
+        closing their job channel, and force-kill any that linger.
+
+        Args:
+            persistent_workers: Persistent wrapper processes to stop.
+        """
+        for process in persistent_workers.values():
+            try:
+                if process.stdin is not None:
+                    process.stdin.close()
+            except OSError:
+                pass
+        for process in persistent_workers.values():
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            self._unregister_child(process)
+        persistent_workers.clear()
+
+    def _register_child(self, process: subprocess.Popen) -> None:
+        """Register a subprocess so that the SIGINT handler can forward
+        signals to it. If signals were already requested, forward them
+        immediately so that a subprocess spawned after CTRL+C does not run
+        unchecked.
+
+        Args:
+            process: Subprocess to register.
+        """
+        with self.lock_child_processes:
+            self.child_processes[process.pid] = process
+            if self.nb_times_sigint >= 3:
+                process.send_signal(signal.SIGTERM)
+            elif self.nb_times_sigint == 2:
+                process.send_signal(signal.SIGINT)
 
-    def _add_aws_temp_credentials(self, env: Dict[str, Any], iam_role: str) -> None:
-        """Add AWS temporary credentials as environment variables to the dict
-        `env`.
+    def _unregister_child(self, process: subprocess.Popen) -> None:
+        """Remove a subprocess from the signal-forwarding registry.
+
+        Args:
+            process: Subprocess to unregister.
+        """
+        with self.lock_child_processes:
+            self.child_processes.pop(process.pid, None)
+
+    def _get_fresh_credentials(self, iam_role: str) -> Optional[Dict[str, str]]:
+        """Return the cached AWS temporary credentials for an IAM role if they
+        were created less than `CACHE_AWS_TEMP_CREDS` seconds ago, or None.
+        The cache entries are immutable tuples, so reading them does not
+        require a lock, and the age is measured with a monotonic clock so
+        that wall-clock adjustments cannot extend credential reuse past
+        expiry.
+
+        Args:
+            iam_role (str): ARN of the IAM role
+        """
+        entry = self.aws_temp_credentials.get(iam_role)
+        if entry is None:
+            return None
+        created_monotonic, credentials = entry
+        if time.monotonic() - created_monotonic < config.CACHE_AWS_TEMP_CREDS:
+            return credentials
+        return None
+
+    def _get_aws_temp_credentials(self, iam_role: str) -> Dict[str, str]:
+        """Return AWS temporary credentials for an IAM role, from the cache if
+        possible. Only cache misses serialize, and only per role, so workers
+        assuming different roles call AssumeRole in parallel.
 
         Args:
-            env (dict): Dictionary to which environment variables are added
             iam_role (str): ARN of the IAM role to assume
         """
-        with self.lock_aws_temp_credentials:
-            credentials = None
-            # If AWS temporary credentials was created for this role less than
-            # `CACHE_AWS_TEMP_CREDS` seconds ago, reuse the credentials
-            if iam_role in self.aws_temp_credentials:
-                created_at = self.aws_temp_credentials[iam_role]["CreatedAt"]
-                created_since = (datetime.utcnow() - created_at).total_seconds()
-                if created_since < config.CACHE_AWS_TEMP_CREDS:
-                    credentials = self.aws_temp_credentials[iam_role]["Credentials"]
-            # Otherwise, assume the role and add AWS temporary credentials to the
-            # cache
+        credentials = self._get_fresh_credentials(iam_role)
+        if credentials is not None:
+            return credentials
+        with self.lock_role_locks:
+            role_lock = self.role_locks.setdefault(iam_role, Lock())
+        with role_lock:
+            # Check the cache again, as another worker may have refreshed the
+            # credentials while this one waited for the role lock
+            credentials = self._get_fresh_credentials(iam_role)
             if credentials is None:
                 credentials = utils.get_aws_temp_credentials(iam_role)
-                self.aws_temp_credentials[iam_role] = {
-                    "CreatedAt": datetime.utcnow(),
-                    "Credentials": credentials,
-                }
-            # Add environment variables
-            env["AWS_ACCESS_KEY_ID"] = credentials["AccessKeyId"]
-            env["AWS_SECRET_ACCESS_KEY"] = credentials["SecretAccessKey"]
-            env["AWS_SESSION_TOKEN"] = credentials["SessionToken"]
+                self.aws_temp_credentials[iam_role] = (time.monotonic(), credentials)
+            return credentials
 
     def _write_subprocess_logs(
         self,
-        key: ModuleAccountRegionKey,
+        log_path: str,
         name_command: str,
         nb_attempts: int,
         filename: str,
-        content: str,
+        content: bytes,
     ) -> None:
-        """Append subprocess logs to the local disk.
+        """Append subprocess logs to the local disk in a single binary write,
+        without decoding and re-encoding the subprocess output.
 
         Args:
-            root_logs_dir: Root path of the folder that stores logs for this run
-            key: Step key
+            log_path: Path of the folder that stores the logs of this step
             name_command: Name of the subprocess
             nb_attempts: Current attempt number
             filename: Name of the file to which logs must be appended
-            content: Logs to append
+            content: Logs to append, as bytes
         """
-        # Create the folder for the log of this module deployment if it does not
-        # exist
-        log_path = os.path.join(
-            self.root_logs_dir, key.module, key.account_id, key.region
+        with self._open_subprocess_log(
+            log_path, name_command, nb_attempts, filename
+        ) as stream:
+            stream.write(content + b"\n")
+
+    @staticmethod
+    def _open_subprocess_log(
+        log_path: str,
+        name_command: str,
+        nb_attempts: int,
+        filename: str,
+    ) -> Any:
+        """Open a subprocess log file in binary append mode and write the
+        attempt header. The log folder was created by the caller at the start
+        of the step. The caller must close the returned stream.
+
+        Args:
+            log_path: Path of the folder that stores the logs of this step
+            name_command: Name of the subprocess
+            nb_attempts: Current attempt number
+            filename: Name of the log file
+
+        Returns:
+            The opened binary stream.
+        """
+        # pylint: disable=consider-using-with
+        stream = open(os.path.join(log_path, filename), "ab")
+        stream.write(
+            (
+                "################################\n"
+                f"# Subprocess '{name_command}'' - Attempt #{nb_attempts}\n"
+                "################################\n"
+            ).encode()
         )
-        if not os.path.isdir(log_path):
-            os.makedirs(log_path)
-        # Write the logs
-        log_file = os.path.join(log_path, filename)
-        with open(log_file, "a", encoding="utf-8") as stream:
-            stream.write("################################\n")
-            stream.write(f"# Subprocess '{name_command}'' - Attempt #{nb_attempts}\n")
-            stream.write("################################\n")
-            stream.write(content)
-            stream.write("\n")
+        # Flush the header so that it reaches the file before the output of a
+        # subprocess to which the stream is handed, as the subprocess writes
+        # to the file descriptor without going through this buffer
+        stream.flush()
+        return stream
+
+    def _signal_children(self, sig: int) -> None:
+        """Forward a signal to the process group of all running subprocesses.
+        Subprocesses are started in a new session, so signaling the group
+        also reaches the processes that they spawned themselves.
+
+        Args:
+            sig: Signal to send.
+        """
+        with self.lock_child_processes:
+            for process in self.child_processes.values():
+                try:
+                    os.killpg(process.pid, sig)
+                except OSError:
+                    pass
+
+    def _signal_drainer(self) -> None:
+        """Process the signals written to the wakeup pipe by the interpreter.
+        The first time CTRL+C is pressed, workers must stop after completing
+        their current step. The second time, a SIGINT signal must be sent to
+        the running subprocesses to wait for a graceful exit. The third time,
+        a SIGTERM signal must be sent to the subprocesses. The fourth time,
+        the signal handler saves the current state store and raises a
+        KeyboardInterrupt exception in the main thread to interrupt this
+        program.
+        """
+        while True:
+            data = os.read(self._sig_read_fd, 1)
+            # The pipe is closed when the execution completes
+            if not data:
+                break
+            self.nb_times_sigint += 1
+            if self.nb_times_sigint == 1:
+                self.stop_workers.set()
+                # Wake the scheduler up so that it stops immediately
+                with self.progress_condition:
+                    self.progress_condition.notify_all()
+                LOGGER.info("Interrupted - Waiting for current deployments to complete")
+            elif self.nb_times_sigint == 2:
+                self._signal_children(signal.SIGINT)
+                LOGGER.info("Interrupted - Sending SIGINT to subprocesses")
+            elif self.nb_times_sigint == 3:
+                self._signal_children(signal.SIGTERM)
+                LOGGER.info("Interrupted - Sending SIGTERM to subprocesses")
+            elif self.nb_times_sigint == 4:
+                LOGGER.info("Interrupted - Forcing deployments to abort")
 
     # pylint: disable=unused-argument
     # The arguments `sig` and `frame` are mandatory but unused
 
     def _catch_sigint(self, sig, frame) -> None:
-        """Catch SIGINT signals while workers are running. The first time
-        CTRL+C is pressed, workers must stop after completing their current
-        step. The second time, workers must be send a SIGINT signal to the
-        running subprocess and wait for a graceful exit. The third time,
-        workers must send a SIGTERM and wait subprocesses to exit. The fourth
-        time, a KeyboardInterrupt exception is raised to interrupt this
-        program.
+        """Catch SIGINT signals while workers are running. The signals are
+        processed by the drainer thread reading the wakeup pipe; this handler
+        only interrupts the main thread once the drainer has already asked
+        the subprocesses to terminate.
         """
-
-        self.nb_times_sigint += 1
-        if self.nb_times_sigint == 1:
-            self.stop_workers.set()
-            LOGGER.info("Interrupted - Waiting for current deployments to complete")
-        elif self.nb_times_sigint == 2:
-            self.send_sigint.set()
-            LOGGER.info("Interrupted - Sending SIGINT to subprocesses")
-        elif self.nb_times_sigint == 3:
-            self.send_sigterm.set()
-            LOGGER.info("Interrupted - Sending SIGTERM to subprocesses")
-        elif self.nb_times_sigint == 4:
+        if self.nb_times_sigint >= 3:
+            # Save the current state store in this thread before unwinding,
+            # as the daemon drainer thread cannot be relied upon to complete
+            # a save before the interpreter exits
             self.package.save()
-            LOGGER.info("Interrupted - Forcing deployments to abort")
-            raise KeyboardInterrupt
-        else:
             raise KeyboardInterrupt
 
     @staticmethod
@@ -3,7 +3,8 @@
 # COMPLETED
 import logging
 import os
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 
 from aws_orga_deployer import config
 from aws_orga_deployer.engines import ENGINES
@@ -17,6 +18,24 @@ class ModuleError(Exception):
     """Exception raised when the package contains invalid modules."""
 
 
+def _scan_engine_dir(engine_path: str) -> List[Tuple[str, str]]:
+    """Return the (name, path) of the module folders of an engine folder. A
+    single scandir pass reads the entry type from the directory entries, which
+    avoids one stat call per entry.
+
+    Args:
+        engine_path: Path to the engine folder.
+    """
+    if not os.path.exists(engine_path):
+        return []
+    with os.scandir(engine_path) as entries:
+        return [
+            (entry.name, entry.path)
+            for entry in entries
+            if entry.is_dir(follow_symlinks=False)
+        ]
+
+
 def load_modules() -> None:
     """Instantiate the Engine class for each module and store them in a
     dict in `config.MODULES`.
@@ -27,21 +46,20 @@ def load_modules() -> None:
     # first level of subfolders correspond to the engine, the second to the
     # modules
     package_path = os.path.dirname(os.path.abspath(config.CLI["package_file"]))
-    # For each type of engine
-    for engine, engine_class in ENGINES.items():
-        engine_path = os.path.join(package_path, engine)
-        # If there is a folder for this engine, list the subfolders and load
-        # modules
-        if os.path.exists(engine_path):
-            for filename in os.listdir(engine_path):
-                fullpath = os.path.join(engine_path, filename)
-                if os.path.isdir(fullpath):
-                    # Module names must be unique
-                    if filename in modules:
-                        raise ModuleError(f"The module {filename} already exists")
-                    modules[filename] = engine_class(filename, fullpath)
-                    modules_stats.setdefault(engine, 0)
-                    modules_stats[engine] += 1
+    # Scan the engine folders concurrently to overlap the I/O, then
+    # instantiate the engine classes serially so that duplicate module names
+    # are reported deterministically
+    engine_paths = [os.path.join(package_path, engine) for engine in ENGINES]
+    with ThreadPoolExecutor(max_workers=len(engine_paths)) as executor:
+        scans = list(executor.map(_scan_engine_dir, engine_paths))
+    for (engine, engine_class), found in zip(ENGINES.items(), scans):
+        for filename, fullpath in found:
+            # Module names must be unique
+            if filename in modules:
+                raise ModuleError(f"The module {filename} already exists")
+            modules[filename] = engine_class(filename, fullpath)
+            modules_stats.setdefault(engine, 0)
+            modules_stats[engine] += 1
     # Save the modules in `config.MODULES` for reuse by other modules, and print
     # module stats
     config.MODULES = modules
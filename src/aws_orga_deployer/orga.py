@@ -1,10 +1,12 @@
 """Information on AWS accounts and organizational units."""
 
 # COMPLETED
+import fnmatch
 import logging
 import re
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Set
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set, Tuple
 
 import botocore
 
@@ -26,6 +28,11 @@ class OrgaParser:
     accounts: Dict[str, Any]
     ous: Dict[str, Any]
     loaded_from_cache: bool
+    _ou_to_accounts: Dict[str, Set[str]]
+    _tag_to_accounts: Dict[Tuple[str, str], Set[str]]
+    _enabled_region_sets: Dict[str, FrozenSet[str]]
+    _all_enabled_regions: List[str]
+    _filter_cache: Dict[Tuple[str, Tuple[str, ...]], List[str]]
 
     def __init__(self) -> None:
         """Load and parse information on AWS accounts and OUs."""
@@ -47,6 +54,7 @@ class OrgaParser:
             # Update the cache in S3
             content = self.export()
             utils.write_dict_to_s3(content, config.ORGA_CACHE_FILENAME)
+        self._build_indexes()
         LOGGER.info(
             "Found %s accounts and %s organizational units",
             len(self.accounts),
@@ -84,8 +92,7 @@ class OrgaParser:
                 key,
             )
             response = client.head_object(Bucket=bucket, Key=key)
-            modified_date = response["LastModified"].replace(tzinfo=None)
-            seconds = (datetime.utcnow() - modified_date).total_seconds()
+            seconds = time.time() - response["LastModified"].timestamp()
             expiration = config.PACKAGE.get(
                 "OrgaCacheExpiration",
                 config.DEFAULT_ORGA_CACHE_EXPIRATION,
@@ -109,10 +116,9 @@ class OrgaParser:
         # Return False if there is no cache in S3 or if the cache could not be
         # loaded
         except botocore.exceptions.ClientError as err:
-            if (
-                isinstance(err, botocore.exceptions.ClientError)
-                and err.response["Error"]["Message"] == "Not Found"
-            ):
+            # Match on the error code, as the error message varies across
+            # botocore versions
+            if err.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
                 LOGGER.debug(
                     "There is no cache of information on accounts and organizational"
                     " units in S3"
@@ -135,55 +141,40 @@ class OrgaParser:
         sts_client = utils.get_aws_client(self.master_session, "sts")
         master_account_id = sts_client.get_caller_identity()["Account"]
         accounts: Dict[str, Dict] = {}
+        # Paginators are stateless, so one instance is shared by the worker
+        # threads instead of being rebuilt for every account
+        tags_paginator = orga_client.get_paginator("list_tags_for_resource")
+        accounts_paginator = orga_client.get_paginator("list_accounts_for_parent")
+        ous_paginator = orga_client.get_paginator(
+            "list_organizational_units_for_parent"
+        )
 
-        def browse_ou(ou_id: str, parent_ou_ids: Optional[List[str]] = None) -> None:
-            """Retrieve the children of an OU and process recurvisely the
-            child OUs.
-
-            Args:
-                ou_id: ID of the organizational unit to process.
-                parent_ou_ids: List of parent OU IDs. Default corresponds to an
-                    empty list.
-            """
-            ou_ids = [ou_id]
-            if not parent_ou_ids is None:
-                ou_ids += parent_ou_ids
-            # Append the list of parent OUs of each account in this OU
-            children_accounts = orga_client.list_children(
-                ParentId=ou_id, ChildType="ACCOUNT"
-            )["Children"]
-            for children_account in children_accounts:
-                if children_account["Id"] in accounts:
-                    accounts[children_account["Id"]]["ParentOUs"] = ou_ids
-            # Browse recursively the organization
-            children_ous = orga_client.list_children(
-                ParentId=ou_id, ChildType="ORGANIZATIONAL_UNIT"
-            )["Children"]
-            for children_ou in children_ous:
-                browse_ou(children_ou["Id"], ou_ids)
-
-        def get_account_tags_regions(account_id: str) -> None:
-            """Retrieve the tags and enabled regions of an account. Update the
-            account name if it must be replaced by the value of a given tag if
-            it exists.
+        def get_account_tags(account_id: str) -> None:
+            """Retrieve the tags of an account. Update the account name if it
+            must be replaced by the value of a given tag if it exists.
 
             Args:
                 account_id: ID of the account.
             """
-            accounts[account_id]["Tags"] = {}
-            # Retrieve the tags
-            paginator = orga_client.get_paginator("list_tags_for_resource")
-            pages = paginator.paginate(ResourceId=account_id)
+            tags: Dict[str, str] = {}
+            pages = tags_paginator.paginate(ResourceId=account_id)
             for page in pages:
                 for tag in page["Tags"]:
-                    accounts[account_id]["Tags"][tag["Key"]] = tag["Value"]
+                    tags[tag["Key"]] = tag["Value"]
+            accounts[account_id]["Tags"] = tags
             # Update the account name if needed
             tag_key = config.PACKAGE.get("OverrideAccountNameByTag")
-            if tag_key in accounts[account_id]["Tags"]:
-                new_account_name = accounts[account_id]["Tags"][tag_key]
-                accounts[account_id]["Name"] = new_account_name
-            # Retrieve the enabled regions. The argument `AcountId` must not
-            # be passed to the `list_regions` request for the master account
+            if tag_key in tags:
+                accounts[account_id]["Name"] = tags[tag_key]
+
+        def get_account_regions(account_id: str) -> None:
+            """Retrieve the enabled regions of an account. The argument
+            `AcountId` must not be passed to the `list_regions` request for
+            the master account.
+
+            Args:
+                account_id: ID of the account.
+            """
             if account_id == master_account_id:
                 regions = account_client.list_regions(
                     RegionOptStatusContains=["ENABLED", "ENABLED_BY_DEFAULT"]
@@ -196,26 +187,70 @@ class OrgaParser:
             enabled_regions = [region["RegionName"] for region in regions]
             accounts[account_id]["EnabledRegions"] = enabled_regions
 
-        # List the accounts that exist in the organization in a dict with
-        # {account_id: {'Name': account_name}}. Exclude non-active accounts.
-        paginator = orga_client.get_paginator("list_accounts")
-        pages = paginator.paginate()
-        for page in pages:
-            for account in page["Accounts"]:
-                if account["Status"] == "ACTIVE":
-                    accounts[account["Id"]] = {"Name": account["Name"]}
-
-        # Recursively browse the organization to find the parent OUs for each
-        # account
-        roots = orga_client.list_roots()["Roots"]
-        for root in roots:
-            browse_ou(root["Id"])
+        def fetch_account_details(item: Tuple[Callable, str]) -> None:
+            """Process one (fetch function, account ID) work item."""
+            fetch, account_id = item
+            fetch(account_id)
 
-        # Retrieve the account tags and enabled the regions for each account
-        # using concurrent threads
+        def browse_ou(
+            ou_id: str, ou_ids: Tuple[str, ...]
+        ) -> Tuple[Dict[str, Dict], List[Tuple[str, Tuple[str, ...]]]]:
+            """Retrieve the accounts and the child OUs of an OU.
+
+            Args:
+                ou_id: ID of the organizational unit to process.
+                ou_ids: Chain of this OU and its parents, closest first.
+
+            Returns:
+                Tuple of (accounts in this OU, child OUs as (ID, chain)).
+            """
+            # Retrieve the accounts in this OU with their name and status in
+            # a single paginated call. Exclude non-active accounts
+            ou_accounts = {}
+            for page in accounts_paginator.paginate(ParentId=ou_id):
+                for account in page["Accounts"]:
+                    if account["Status"] == "ACTIVE":
+                        ou_accounts[account["Id"]] = {
+                            "Name": account["Name"],
+                            "ParentOUs": list(ou_ids),
+                        }
+            children = []
+            for page in ous_paginator.paginate(ParentId=ou_id):
+                for children_ou in page["OrganizationalUnits"]:
+                    children.append((children_ou["Id"], (children_ou["Id"],) + ou_ids))
+            return ou_accounts, children
+
+        # Browse the organization to build a dict with
+        # {account_id: {'Name': account_name, 'ParentOUs': parent_ou_ids}}.
+        # `list_accounts_for_parent` returns full account records, so a
+        # separate `list_accounts` pass is not needed. OUs are queried by
+        # concurrent threads so that sibling branches of the tree do not
+        # serialize their API round-trips, and the results are merged in this
+        # thread as they complete, so `accounts` needs no lock
+        roots = orga_client.list_roots()["Roots"]
+        with ThreadPoolExecutor(max_workers=config.CONCURRENT_ORGA_THREADS) as executor:
+            pending = {
+                executor.submit(browse_ou, root["Id"], (root["Id"],)) for root in roots
+            }
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ou_accounts, children = future.result()
+                    accounts.update(ou_accounts)
+                    for child_id, child_ou_ids in children:
+                        pending.add(executor.submit(browse_ou, child_id, child_ou_ids))
+
+        # Retrieve the account tags and the enabled regions for each account
+        # using concurrent threads. The two requests are independent, so they
+        # are submitted as separate work items and overlap for the same
+        # account instead of being chained in one worker
         utils.exec_multithread(
-            list(accounts.keys()),
-            get_account_tags_regions,
+            [
+                (fetch, account_id)
+                for account_id in accounts
+                for fetch in (get_account_tags, get_account_regions)
+            ],
+            fetch_account_details,
             config.CONCURRENT_ORGA_THREADS,
         )
         self.accounts = accounts
@@ -227,12 +262,14 @@ class OrgaParser:
         """
         orga_client = utils.get_aws_client(self.master_session, "organizations")
         ous: Dict[str, Dict] = {}
+        # Paginators are stateless, so one instance is shared by the worker
+        # threads instead of being rebuilt for every OU
+        tags_paginator = orga_client.get_paginator("list_tags_for_resource")
 
         # Get the list of unique OUs
-        ou_ids = []
+        ou_ids: Set[str] = set()
         for account in self.accounts.values():
-            ou_ids += account["ParentOUs"]
-        ou_ids = list(set(ou_ids))
+            ou_ids.update(account["ParentOUs"])
 
         def get_ou_name_tags(ou_id: str) -> None:
             """Retrieve the name and the tags of an organizational unit.
@@ -250,16 +287,38 @@ class OrgaParser:
             else:
                 ous[ou_id]["Name"] = "root"
             # Retrieve the tags
-            paginator = orga_client.get_paginator("list_tags_for_resource")
-            pages = paginator.paginate(ResourceId=ou_id)
+            pages = tags_paginator.paginate(ResourceId=ou_id)
             for page in pages:
                 for tag in page["Tags"]:
                     ous[ou_id]["Tags"][tag["Key"]] = tag["Value"]
 
         # Retrieve the name and the tags for each OU using concurrent threads
-        utils.exec_multithread(ou_ids, get_ou_name_tags, config.CONCURRENT_ORGA_THREADS)
+        utils.exec_multithread(
+            list(ou_ids), get_ou_name_tags, config.CONCURRENT_ORGA_THREADS
+        )
         self.ous = ous
 
+    def _build_indexes(self) -> None:
+        """Build inverted indexes over the accounts, so that the account
+        filters are set operations on precomputed sets instead of nested
+        loops over every account.
+        """
+        self._ou_to_accounts = {}
+        self._tag_to_accounts = {}
+        self._enabled_region_sets = {}
+        self._filter_cache = {}
+        all_regions: Set[str] = set()
+        for account_id, account in self.accounts.items():
+            self._enabled_region_sets[account_id] = frozenset(account["EnabledRegions"])
+            all_regions.update(account["EnabledRegions"])
+            for parent_ou in account["ParentOUs"]:
+                self._ou_to_accounts.setdefault(parent_ou, set()).add(account_id)
+            for tag_key, tag_value in account["Tags"].items():
+                self._tag_to_accounts.setdefault((tag_key, tag_value), set()).add(
+                    account_id
+                )
+        self._all_enabled_regions = sorted(all_regions)
+
     def export(self) -> Dict[str, Dict[str, Dict]]:
         """Returns a dict with information on AWS accounts and organizational
         units.
@@ -293,7 +352,8 @@ class OrgaParser:
         Returns:
             List of account IDs.
         """
-        return [account_id for account_id in self.accounts if account_id in account_ids]
+        wanted = set(account_ids)
+        return [account_id for account_id in self.accounts if account_id in wanted]
 
     def get_accounts_by_name(self, patterns: List[str]) -> List[str]:
         """Return the list of accounts IDs in the organization whose account
@@ -306,14 +366,15 @@ class OrgaParser:
             List of account IDs.
         """
 
+        # fnmatch.translate returns an anchored pattern that cannot backtrack
+        # pathologically, unlike a hand-rolled ".*" rewrite. Compile the
+        # patterns once instead of once per account and pattern
+        compiled = [re.compile(fnmatch.translate(pattern)) for pattern in patterns]
         result = []
         for account_id, account in self.accounts.items():
-            for pattern in patterns:
-                expr = re.escape(pattern).replace("\\*", ".*")
-                expr = "^" + expr + "$"
-                if re.match(expr, account["Name"]):
-                    result.append(account_id)
-                    break
+            name = account["Name"]
+            if any(pattern.match(name) for pattern in compiled):
+                result.append(account_id)
         return result
 
     def get_accounts_by_ou(self, ou_ids: List[str]) -> List[str]:
@@ -326,13 +387,24 @@ class OrgaParser:
         Returns:
             List of account IDs.
         """
-        result = []
-        for account_id, account in self.accounts.items():
-            for parent_ou in account["ParentOUs"]:
-                if parent_ou in ou_ids:
-                    result.append(account_id)
-                    break
-        return result
+        return self._get_accounts_by_ou_cached(tuple(ou_ids))
+
+    def _get_accounts_by_ou_cached(self, ou_ids: Tuple[str, ...]) -> List[str]:
+        """Evaluate `get_accounts_by_ou` from the inverted indexes. The
+        filters are typically evaluated with the same arguments once per
+        module of the deployment configuration, so the result is memoized in
+        `_filter_cache`. A per-instance dict is used instead of lru_cache on
+        the method, which would keep the object alive in a class-level cache.
+        """
+        cache_key = ("ou", ou_ids)
+        if cache_key not in self._filter_cache:
+            matched: Set[str] = set()
+            for ou_id in ou_ids:
+                matched |= self._ou_to_accounts.get(ou_id, set())
+            self._filter_cache[cache_key] = [
+                account_id for account_id in self.accounts if account_id in matched
+            ]
+        return self._filter_cache[cache_key]
 
     def get_accounts_by_tag(self, tags: List[str]) -> List[str]:
         """Return the list of account IDs in the organization that have a set of
@@ -344,17 +416,28 @@ class OrgaParser:
         Returns:
             List of account IDs.
         """
-        result = []
-        for account_id, account in self.accounts.items():
-            account_has_all_tags = True
-            for tag in tags:
-                tag_key, tag_value = tag.split("=")
-                if not account["Tags"].get(tag_key) == tag_value:
-                    account_has_all_tags = False
-                    break
-            if account_has_all_tags:
-                result.append(account_id)
-        return result
+        return self._get_accounts_by_tag_cached(tuple(tags))
+
+    def _get_accounts_by_tag_cached(self, tags: Tuple[str, ...]) -> List[str]:
+        """Evaluate `get_accounts_by_tag` from the inverted indexes,
+        memoized as for `_get_accounts_by_ou_cached`."""
+        cache_key = ("tag", tags)
+        if cache_key not in self._filter_cache:
+            self._filter_cache[cache_key] = self._eval_accounts_by_tag(tags)
+        return self._filter_cache[cache_key]
+
+    def _eval_accounts_by_tag(self, tags: Tuple[str, ...]) -> List[str]:
+        """Evaluate `get_accounts_by_tag` without memoization."""
+        matched: Optional[Set[str]] = None
+        for tag in tags:
+            tag_key, tag_value = tag.split("=", 1)
+            tag_accounts = self._tag_to_accounts.get((tag_key, tag_value), set())
+            matched = tag_accounts if matched is None else matched & tag_accounts
+            if not matched:
+                return []
+        if matched is None:
+            return list(self.accounts)
+        return [account_id for account_id in self.accounts if account_id in matched]
 
     def get_accounts_by_ou_tag(self, tags: List[str]) -> List[str]:
         """Return the list of account IDs in the organization that belong to
@@ -366,20 +449,33 @@ class OrgaParser:
         Returns:
             List of account IDs.
         """
-        result = []
-        for account_id, account in self.accounts.items():
-            for parent_ou_id in account["ParentOUs"]:
-                ou_has_all_tags = True
-                parent_ou_tags = self.ous[parent_ou_id]["Tags"]
-                for tag in tags:
-                    tag_key, tag_value = tag.split("=")
-                    if not parent_ou_tags.get(tag_key) == tag_value:
-                        ou_has_all_tags = False
-                        break
-                if ou_has_all_tags:
-                    result.append(account_id)
+        return self._get_accounts_by_ou_tag_cached(tuple(tags))
+
+    def _get_accounts_by_ou_tag_cached(self, tags: Tuple[str, ...]) -> List[str]:
+        """Evaluate `get_accounts_by_ou_tag` from the inverted indexes,
+        memoized as for `_get_accounts_by_ou_cached`. The OUs that carry all
+        the requested tags are identified first, then their accounts are
+        gathered from the OU index.
+        """
+        cache_key = ("ou_tag", tags)
+        if cache_key in self._filter_cache:
+            return self._filter_cache[cache_key]
+        # Split the tags once instead of once per OU and tag
+        parsed_tags = [tag.split("=", 1) for tag in tags]
+        matched: Set[str] = set()
+        for ou_id, ou_details in self.ous.items():
+            ou_tags = ou_details["Tags"]
+            ou_has_all_tags = True
+            for tag_key, tag_value in parsed_tags:
+                if ou_tags.get(tag_key) != tag_value:
+                    ou_has_all_tags = False
                     break
-        return result
+            if ou_has_all_tags:
+                matched |= self._ou_to_accounts.get(ou_id, set())
+        self._filter_cache[cache_key] = [
+            account_id for account_id in self.accounts if account_id in matched
+        ]
+        return self._filter_cache[cache_key]
 
     def get_account_regions(self, account_id: str, regions: List[str]) -> List[str]:
         """Return the list of regions that are enabled in a given account and
@@ -403,14 +499,12 @@ class OrgaParser:
 
     def get_all_enabled_regions(self) -> List[str]:
         """Return a list of regions that are enabled in at least one account.
+        The union is computed once when the accounts are loaded.
 
         Return:
             List of regions.
         """
-        regions: Set[str] = set()
-        for account in self.accounts.values():
-            regions = regions | set(account["EnabledRegions"])
-        return list(regions)
+        return self._all_enabled_regions
 
     def get_account_name(self, account_id: str) -> str:
         """Return the account name of a given account ID.
@@ -438,7 +532,5 @@ class OrgaParser:
         Returns:
             True if the account exists and the region is enabled.
         """
-        if account_id in self.accounts:
-            if region in self.accounts[account_id]["EnabledRegions"]:
-                return True
-        return False
+        enabled_regions = self._enabled_region_sets.get(account_id)
+        return enabled_regions is not None and region in enabled_regions
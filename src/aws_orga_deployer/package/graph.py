@@ -6,6 +6,7 @@ and the edges representing dependencies between steps.
 # COMPLETED
 import logging
 from datetime import datetime, timedelta
+from threading import Lock
 from typing import Dict, List, Optional, Tuple
 
 import networkx as nx
@@ -83,11 +84,14 @@ class StepDetails:
 
 class DeploymentGraph:
     """Class that represents the deployment steps, their dependencies and
-    status.
+    status. The methods that read or change step statuses (`next`, `complete`
+    and `fail`) take an internal lock, so callers do not need to serialize
+    access to the graph.
     """
 
     def __init__(self) -> None:
         self._graph = nx.DiGraph()
+        self._lock = Lock()
 
     def list_steps(self) -> List[ModuleAccountRegionKey]:
         """Returns the list of steps in the deployment graph.
@@ -304,77 +308,92 @@ class DeploymentGraph:
 
         def mark_as_failed(key: ModuleAccountRegionKey, details: StepDetails) -> None:
             """Change the status to "failed" because one of the dependencies
-            failed.
+            failed. The error is logged once the lock is released.
             """
             details.status = "failed"
             details.result = "Failed because at least one dependency failed"
-            LOGGER.error("%s Failed because at least one dependency failed", key)
-
-        # The topological sort returns the list of steps in the order of which
-        # they must be processed (dependencies first)
-        path = list(nx.topological_sort(self._graph))
-        # We start with delete operations, from the end of the path because
-        # deployments must be deleted before their dependencies are deleted
-        for key in reversed(path):
-            details = self._graph.nodes[key]["details"]
-            # Skip if the step is still waiting after a failed attempt
-            if step_is_waiting(details):
-                continue
-            # If a deployment must be deleted
-            if details.action == "destroy" and details.status == "pending":
-                # If at least one descendant failed, change the status to
-                # failed
-                if any(
-                    self._graph.nodes[descendant_key]["details"].status == "failed"
-                    for descendant_key in self._graph.successors(key)
-                ):
-                    mark_as_failed(key, details)
-                # If all descendants have completed, change the status to
-                # ongoing and return the node key
-                if all(
-                    self._graph.nodes[descendant_key]["details"].status
-                    in ("completed", "skipped")
-                    for descendant_key in self._graph.successors(key)
+            failed_keys.append(key)
+
+        failed_keys: List[ModuleAccountRegionKey] = []
+        try:
+            return self._next_locked(step_is_waiting, mark_as_ongoing, mark_as_failed)
+        finally:
+            for failed_key in failed_keys:
+                LOGGER.error(
+                    "%s Failed because at least one dependency failed", failed_key
+                )
+
+    def _next_locked(self, step_is_waiting, mark_as_ongoing, mark_as_failed):
+        """Scan the graph for the next step to process while holding the
+        internal lock. See `next`.
+        """
+        # pylint: disable=too-many-branches
+        with self._lock:
+            # The topological sort returns the list of steps in the order of
+            # which they must be processed (dependencies first)
+            path = list(nx.topological_sort(self._graph))
+            # We start with delete operations, from the end of the path because
+            # deployments must be deleted before their dependencies are deleted
+            for key in reversed(path):
+                details = self._graph.nodes[key]["details"]
+                # Skip if the step is still waiting after a failed attempt
+                if step_is_waiting(details):
+                    continue
+                # If a deployment must be deleted
+                if details.action == "destroy" and details.status == "pending":
+                    # If at least one descendant failed, change the status to
+                    # failed
+                    if any(
+                        self._graph.nodes[descendant_key]["details"].status == "failed"
+                        for descendant_key in self._graph.successors(key)
+                    ):
+                        mark_as_failed(key, details)
+                    # If all descendants have completed, change the status to
+                    # ongoing and return the node key
+                    if all(
+                        self._graph.nodes[descendant_key]["details"].status
+                        in ("completed", "skipped")
+                        for descendant_key in self._graph.successors(key)
+                    ):
+                        mark_as_ongoing(details)
+                        return key
+            # We continue with all create and update operations, from the beginning
+            # of the path, if no delete operation was returned
+            for key in path:
+                details = self._graph.nodes[key]["details"]
+                # Skip if the step is still waiting after a failed attempt
+                if step_is_waiting(details):
+                    continue
+                # If a node must be created or updated
+                if (
+                    details.action in ("create", "update", "conditional-update")
+                    and details.status == "pending"
                 ):
-                    mark_as_ongoing(details)
-                    return key
-        # We continue with all create and update operations, from the beginning
-        # of the path, if no delete operation was returned
-        for key in path:
-            details = self._graph.nodes[key]["details"]
-            # Skip if the step is still waiting after a failed attempt
-            if step_is_waiting(details):
-                continue
-            # If a node must be created or updated
-            if (
-                details.action in ("create", "update", "conditional-update")
-                and details.status == "pending"
+                    # If at least one ancestor failed, the status is changed to
+                    # failed
+                    if any(
+                        self._graph.nodes[ancestor_key]["details"].status == "failed"
+                        for ancestor_key in self._graph.predecessors(key)
+                    ):
+                        mark_as_failed(key, details)
+                    # If all ancestors have completed or are skipped, the node can
+                    # be processed
+                    if all(
+                        self._graph.nodes[ancestor_key]["details"].status
+                        in ("completed", "skipped")
+                        for ancestor_key in self._graph.predecessors(key)
+                    ):
+                        mark_as_ongoing(details)
+                        return key
+            # Raise NoProcessableStep if there are still pending steps to process
+            # but their dependencies must complete first
+            if any(
+                details.status == "pending"
+                for _, details in self._graph.nodes(data="details")
             ):
-                # If at least one ancestor failed, the status is changed to
-                # failed
-                if any(
-                    self._graph.nodes[ancestor_key]["details"].status == "failed"
-                    for ancestor_key in self._graph.predecessors(key)
-                ):
-                    mark_as_failed(key, details)
-                # If all ancestors have completed or are skipped, the node can
-                # be processed
-                if all(
-                    self._graph.nodes[ancestor_key]["details"].status
-                    in ("completed", "skipped")
-                    for ancestor_key in self._graph.predecessors(key)
-                ):
-                    mark_as_ongoing(details)
-                    return key
-        # Raise NoProcessableStep if there are still pending steps to process
-        # but their dependencies must complete first
-        if any(
-            details.status == "pending"
-            for _, details in self._graph.nodes(data="details")
-        ):
-            raise NoProcessableStep
-        # Raise NoMorePendingStep if there is no more steps to process
-        raise NoMorePendingStep
+                raise NoProcessableStep
+            # Raise NoMorePendingStep if there is no more steps to process
+            raise NoMorePendingStep
 
     def complete(
         self,
@@ -392,11 +411,12 @@ class DeploymentGraph:
             result: One-line summary of the result. Default to empty.
             detailed_results: Dict with detailed results. Default to None.
         """
-        details = self._graph.nodes[key]["details"]
-        details.status = "completed"
-        details.made_changes = made_changes
-        details.result = result
-        details.detailed_results = detailed_results
+        with self._lock:
+            details = self._graph.nodes[key]["details"]
+            details.status = "completed"
+            details.made_changes = made_changes
+            details.result = result
+            details.detailed_results = detailed_results
 
     def fail(
         self,
@@ -412,13 +432,16 @@ class DeploymentGraph:
             result: One-line summary of the result. Default to empty.
             detailed_results: Dict with detailed results. Default to None.
         """
-        details = self._graph.nodes[key]["details"]
-        # If the number of maximum attempts is not reached, set the status
-        # to "pending"
-        details.result = result
-        details.detailed_results = detailed_results
-        if details.nb_attempts < details.max_attempts:
-            details.status = "pending"
-            details.wait_until = datetime.utcnow() + timedelta(seconds=details.delay)
-        else:
-            details.status = "failed"
+        with self._lock:
+            details = self._graph.nodes[key]["details"]
+            # If the number of maximum attempts is not reached, set the status
+            # to "pending"
+            details.result = result
+            details.detailed_results = detailed_results
+            if details.nb_attempts < details.max_attempts:
+                details.status = "pending"
+                details.wait_until = datetime.utcnow() + timedelta(
+                    seconds=details.delay
+                )
+            else:
+                details.status = "failed"
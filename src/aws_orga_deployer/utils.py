@@ -1,6 +1,7 @@
 """General utility functions."""
 
 # COMPLETED
+import functools
 import json
 import logging
 import queue
@@ -13,6 +14,12 @@ from botocore.session import Session
 
 from aws_orga_deployer import config
 
+try:
+    # orjson is optional and considerably faster than the standard library
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
 LOGGER = logging.getLogger(__name__)
 LOGGER.addHandler(logging.NullHandler())
 
@@ -139,6 +146,14 @@ def exec_multithread(items: List[Any], func: Callable, concurrency: int) -> None
         thread.join()
 
 
+@functools.lru_cache(maxsize=4096)
+def _prefixed_s3_key(prefix: str, object_path: str) -> str:
+    """Concatenate an S3 prefix and an object path, memoized as the same keys
+    are recomputed for every step of a deployment run.
+    """
+    return prefix + object_path
+
+
 def get_s3_key(object_path: str) -> str:
     """Prepends the S3 prefix to the object path and returns the result.
 
@@ -148,7 +163,9 @@ def get_s3_key(object_path: str) -> str:
     Returns:
         S3Prefix concatenated with object path.
     """
-    return config.PACKAGE.get("S3Prefix", "") + object_path
+    # The prefix is part of the cache key so that a package reload with a
+    # different prefix does not return stale keys
+    return _prefixed_s3_key(config.PACKAGE.get("S3Prefix", ""), object_path)
 
 
 class FileNotExists(Exception):
@@ -178,6 +195,8 @@ def load_json_from_s3(object_path: str) -> Dict:
         LOGGER.debug("Reading the S3 object at s3://%s/%s", bucket, key)
         response = client.get_object(Bucket=bucket, Key=key)
         content_bytes = response["Body"].read()
+        if orjson is not None:
+            return orjson.loads(content_bytes)
         return json.loads(content_bytes.decode())
     except client.exceptions.NoSuchKey as err:
         raise FileNotExists from err
@@ -190,7 +209,10 @@ def write_dict_to_s3(content: Dict, object_path: str) -> None:
         content: Content to wroite.
         object_path: Object path in the dedicated S3 prefix.
     """
-    content_bytes = json.dumps(content, indent=4).encode()
+    if orjson is not None:
+        content_bytes = orjson.dumps(content, option=orjson.OPT_INDENT_2)
+    else:
+        content_bytes = json.dumps(content, indent=4).encode()
     bucket = config.PACKAGE["S3Bucket"]
     key = get_s3_key(object_path)
     client = get_aws_client(
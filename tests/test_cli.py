@@ -0,0 +1,81 @@
+"""Test the module `aws_orga_deployer.cli`."""
+
+# pylint: disable=protected-access
+import unittest
+from unittest.mock import patch
+
+from aws_orga_deployer import cli
+
+
+class TestFastParse(unittest.TestCase):
+    """Test the hand-written parser `_fast_parse` against the argparse
+    parser, so that both parsers accept the same invocations and return the
+    same arguments.
+    """
+
+    # Invocations that the fast parser must handle without falling back
+    FAST_INVOCATIONS = [
+        ["orga"],
+        ["-p", "package.yaml", "orga"],
+        ["--package-file", "package.yaml", "--debug", "orga"],
+        ["--package-file=package.yaml", "orga"],
+        ["-o", "output.json", "--temp-dir", "tmp", "orga"],
+        ["--force-orga-refresh", "-d", "orga"],
+        ["list"],
+        ["list", "--detailed-exitcode"],
+        ["list", "--include-modules", "module1", "module2"],
+        ["list", "--exclude-regions", "eu-west-1"],
+        ["list", "--include-account-ids", "123456789012", "210987654321"],
+        ["preview", "--non-interactive", "--keep-deployment-cache"],
+        ["preview", "--include-account-tags", "Environment=prod"],
+        ["apply", "--save-state-every-seconds", "60"],
+        ["apply", "-f", "--include-ou-ids", "ou-1234-12345678"],
+        ["update-hash", "--non-interactive"],
+        ["remove-orphans", "--dry-run"],
+    ]
+
+    # Invocations that argparse rejects and that the fast parser must
+    # therefore hand over to argparse instead of mis-parsing
+    FALLBACK_INVOCATIONS = [
+        # Value flag followed by another option instead of a value
+        ["-p", "--debug", "orga"],
+        ["-o", "--temp-dir", "tmp", "orga"],
+        ["--temp-dir", "-d", "orga"],
+        # Unknown option or command
+        ["--unknown-option", "orga"],
+        ["unknown-command"],
+        # Missing or invalid values
+        ["-p"],
+        ["list", "--include-account-ids", "12345"],
+        ["list", "--include-account-tags", "MissingValue"],
+        ["apply", "--save-state-every-seconds", "zero"],
+        ["apply", "--save-state-every-seconds", "0"],
+    ]
+
+    @staticmethod
+    def _argparse(argv):
+        """Parse an invocation with the argparse parser."""
+        with patch.object(cli.sys, "argv", ["aws-orga-deployer"] + argv):
+            return cli._argparse_cli_args()
+
+    def test_fast_parse_matches_argparse(self):
+        """Check that the fast parser returns the same arguments as argparse
+        for the invocations it handles.
+        """
+        for argv in self.FAST_INVOCATIONS:
+            with self.subTest(argv=argv):
+                self.assertEqual(cli._fast_parse(argv), self._argparse(argv))
+
+    def test_fast_parse_falls_back(self):
+        """Check that the fast parser falls back to argparse for the
+        invocations that argparse rejects, instead of mis-parsing them.
+        """
+        for argv in self.FALLBACK_INVOCATIONS:
+            with self.subTest(argv=argv):
+                self.assertIsNone(cli._fast_parse(argv))
+                with self.assertRaises(SystemExit):
+                    self._argparse(argv)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Test the module `aws_orga_deployer.engines.wrappers.base`."""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# Worker script that services jobs with a handler writing to the Python-level
+# stdout and stderr, to the file descriptor 1 directly, and spawning a
+# subprocess that inherits the file descriptor 1. None of these writes must
+# corrupt the JSON job channel.
+WORKER_SCRIPT = """
+import os
+import subprocess
+import sys
+
+from aws_orga_deployer.engines.wrappers import base
+
+
+def handler(args):
+    print("python stdout " + args[0])
+    print("python stderr " + args[0], file=sys.stderr)
+    os.write(1, b"raw write to fd 1\\n")
+    subprocess.run([sys.executable, "-c", "print('subprocess stdout')"], check=True)
+    if args[0] == "fail":
+        raise ValueError("job failed")
+
+
+base.worker_loop(handler)
+"""
+
+
+class TestWorkerLoop(unittest.TestCase):
+    """Test the newline-delimited JSON job protocol of `worker_loop`."""
+
+    def test_worker_loop_protocol(self):
+        """Check that every job returns one parseable JSON result line with
+        the captured stdout and stderr, even when the handler or one of its
+        subprocesses writes to the file descriptor 1 directly.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            script_filename = os.path.join(tmp_dir, "worker.py")
+            with open(script_filename, "w", encoding="utf-8") as stream:
+                stream.write(WORKER_SCRIPT)
+            with subprocess.Popen(
+                [sys.executable, script_filename],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            ) as process:
+                for args in (["first"], ["fail"], ["second"]):
+                    job = {"cwd": tmp_dir, "env": dict(os.environ), "args": args}
+                    process.stdin.write(json.dumps(job) + "\n")
+                    process.stdin.flush()
+                results = [json.loads(process.stdout.readline()) for _ in range(3)]
+                process.stdin.close()
+                process.wait(timeout=30)
+        # The first and third jobs succeed, the second job fails but must not
+        # terminate the worker process
+        self.assertTrue(results[0]["ok"])
+        self.assertFalse(results[1]["ok"])
+        self.assertTrue(results[2]["ok"])
+        for result, value in zip(results, ("first", "fail", "second")):
+            self.assertIn("python stdout " + value, result["stdout"])
+            self.assertIn("python stderr " + value, result["stderr"])
+        self.assertIn("ValueError: job failed", results[1]["stderr"])
+
+
+if __name__ == "__main__":
+    unittest.main()